@@ -0,0 +1,132 @@
+"""
+Lumi Dashboard agents
+OpenClaw agents and their workspaces, discovered from openclaw.json. Shared by
+api.py and server.py; standard library only.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+OPENCLAW_DIR = Path.home() / '.openclaw'
+OPENCLAW_CONFIG = OPENCLAW_DIR / 'openclaw.json'
+
+# Used when the config lists no agents
+DEFAULT_AGENT_ID = 'main'
+DEFAULT_AGENT_NAME = 'Lumi'
+
+
+class Agent:
+    """One configured agent: id, display name and workspace directory."""
+
+    __slots__ = ('id', 'name', 'workspace', 'default')
+
+    def __init__(self, agent_id: str, name: str, workspace: Path, default: bool = False):
+        self.id = agent_id
+        self.name = name
+        self.workspace = workspace
+        self.default = default
+
+    def key(self) -> tuple:
+        return (self.id, self.name, self.workspace, self.default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'id': self.id, 'name': self.name, 'workspace': str(self.workspace), 'default': self.default}
+
+
+def resolve_path(value: Any, base: Path) -> Optional[Path]:
+    """A configured path with ~ expanded, relative ones taken from `base`."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return base / Path(value.strip()).expanduser()
+
+
+def discover(config: Any, base: Path = OPENCLAW_DIR) -> List[Agent]:
+    """Agents listed in a parsed openclaw.json, default agent first.
+
+    Reads `agents.list` (`id`, `name` or `identity.name`, `workspace`,
+    `default`) and `agents.defaults.workspace`. The default agent is the
+    one marked `default`, else the first listed; it uses the default
+    workspace unless it names its own, other agents `workspace-<id>`. An
+    empty or missing list gives a single main agent.
+    """
+    section = config.get('agents') if isinstance(config, dict) else None
+    section = section if isinstance(section, dict) else {}
+    defaults = section.get('defaults') if isinstance(section.get('defaults'), dict) else {}
+    default_workspace = resolve_path(defaults.get('workspace'), base) or base / 'workspace'
+
+    entries = {}
+    listed = section.get('list')
+    for entry in listed if isinstance(listed, list) else ():
+        if isinstance(entry, dict) and isinstance(entry.get('id'), str) and entry['id'].strip():
+            entries.setdefault(entry['id'].strip(), entry)
+    if not entries:
+        return [Agent(DEFAULT_AGENT_ID, DEFAULT_AGENT_NAME, default_workspace, default=True)]
+
+    default_id = next((agent_id for agent_id, entry in entries.items() if entry.get('default') is True),
+                      next(iter(entries)))
+    agents = []
+    for agent_id, entry in entries.items():
+        identity = entry.get('identity') if isinstance(entry.get('identity'), dict) else {}
+        name = entry.get('name') or identity.get('name') or agent_id
+        workspace = resolve_path(entry.get('workspace'), base)
+        if workspace is None:
+            workspace = default_workspace if agent_id == default_id else base / f'workspace-{agent_id}'
+        agents.append(Agent(agent_id, str(name), workspace, default=agent_id == default_id))
+    agents.sort(key=lambda agent: not agent.default)
+    return agents
+
+
+class AgentRegistry:
+    """Agents from an openclaw.json, re-read when the file's mtime or size changes.
+
+    A file that can't be read or parsed keeps the agents found last (or the
+    single default agent if there were none). `version` goes up whenever
+    the agent list changes.
+    """
+
+    def __init__(self, path: Path = OPENCLAW_CONFIG):
+        self.path = path
+        self._key: Any = ()
+        self._agents: Dict[str, Agent] = {}
+        self._default: Optional[Agent] = None
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def _stat_key(self) -> Optional[tuple]:
+        try:
+            stat = self.path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def _reload(self, key: Optional[tuple]):
+        config: Any = {}
+        if key is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    config = json.load(f)
+            except (OSError, ValueError):
+                if self._agents:
+                    self._key = key
+                    return
+        found = discover(config, self.path.parent)
+        self._key = key
+        if [agent.key() for agent in found] != [agent.key() for agent in self._agents.values()]:
+            self._agents = {agent.id: agent for agent in found}
+            self._default = found[0]
+            self.version += 1
+
+    def agents(self) -> List[Agent]:
+        """Current agents, default first."""
+        key = self._stat_key()
+        with self._lock:
+            if key != self._key:
+                self._reload(key)
+            return list(self._agents.values())
+
+    def get(self, agent_id: Optional[str] = None) -> Optional[Agent]:
+        """An agent by id, the default agent for None, or None if there is no such agent."""
+        self.agents()
+        return self._default if agent_id is None else self._agents.get(agent_id)
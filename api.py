@@ -4,196 +4,1190 @@ Lumi Dashboard API
 Dynamic behavior flow chart generator - scans workspace files and extracts behavioral rules.
 """
 
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, abort, g, jsonify, request, send_file
+from werkzeug.security import safe_join
+from flask.json.provider import DefaultJSONProvider
 import re
 import os
+import base64
+import bisect
+import collections
+import concurrent.futures
+import cProfile
+import ctypes
+import ctypes.util
+import fnmatch
+import hashlib
+import heapq
+import hmac
+import itertools
+import multiprocessing
+import operator
+import pstats
+import select
+import sqlite3
+import struct
+import sys
+import tempfile
+import time
+import threading
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Set
 import json
 
-app = Flask(__name__, static_folder='.', static_url_path='')
+import agents
+import assets
+import metrics
 
-WORKSPACE = Path('/home/ubuntu/.openclaw/workspace')
+try:
+    import orjson
+except ImportError:  # optional: stdlib json encoder
+    orjson = None
+
+app = Flask(__name__, static_folder=None)
+
+STATIC_DIR = Path(__file__).resolve().parent
+
+# Agents and their workspaces come from OpenClaw's config (agents.py); each
+# agent gets its own rule index, and indexes are refreshed on a thread pool
+# of this many workers
+REFRESH_WORKERS = max(1, int(os.environ.get('LUMI_REFRESH_WORKERS', '4')))
+
+# Re-validate cached files by content hash when mtime/size change
+# (e.g. a `touch` or an editor rewriting identical content).
+CACHE_CONTENT_HASH = os.environ.get('LUMI_CACHE_HASH', '0') == '1'
+
+# Optional SQLite file persisting extraction results across restarts
+# (also read by server.py); empty disables it
+RULE_DB = os.environ.get('LUMI_RULE_DB', '')
+
+# Workspace scanning: root-level files only, or the whole tree when recursive.
+# Globs match paths relative to the workspace; an excluded directory prunes
+# everything below it.
+SCAN_RECURSIVE = os.environ.get('LUMI_SCAN_RECURSIVE', '0') == '1'
+SCAN_INCLUDE = os.environ.get('LUMI_SCAN_INCLUDE', '*.md').split(',')
+SCAN_EXCLUDE = os.environ.get('LUMI_SCAN_EXCLUDE', '.*,node_modules,__pycache__').split(',')
+
+# Fan extraction out to a process pool once the files to (re-)extract exceed this size
+PARALLEL_MIN_BYTES = int(os.environ.get('LUMI_PARALLEL_MIN_BYTES', str(8 * 1024 * 1024)))
+PARALLEL_WORKERS = int(os.environ.get('LUMI_PARALLEL_WORKERS', '0')) or os.cpu_count() or 1
+
+# Files at least this large are scanned in overlapping windows instead of
+# being read whole. Matches spanning lines beyond the overlap aren't guaranteed.
+STREAM_MIN_BYTES = int(os.environ.get('LUMI_STREAM_MIN_BYTES', str(32 * 1024 * 1024)))
+STREAM_CHUNK_CHARS = int(os.environ.get('LUMI_STREAM_CHUNK', str(1024 * 1024)))
+STREAM_OVERLAP_CHARS = int(os.environ.get('LUMI_STREAM_OVERLAP', str(64 * 1024)))
+STREAM_CONTEXT_PAD = 1024  # text kept before a window for rule context (> 2x context chars)
+STREAM_MARGIN = 1024       # matches ending this close to a window's end are re-scanned
+
+# Per-pattern regex time for /api/metrics is measured on one in this many
+# attempts (a power of two) and scaled up
+PATTERN_TIMING_SAMPLE = 8
+
+# /api/debug/profile is disabled unless a token is set; requests must send it
+# in an X-Profile-Token header. The newest PROFILE_KEEP .pstats dumps are kept.
+PROFILE_TOKEN = os.environ.get('LUMI_PROFILE_TOKEN', '')
+PROFILE_DIR = Path(os.environ.get('LUMI_PROFILE_DIR', '') or Path(tempfile.gettempdir()) / 'lumi-profiles')
+PROFILE_KEEP = max(1, int(os.environ.get('LUMI_PROFILE_KEEP', '20')))
+PROFILE_SORTS = ('tottime', 'cumulative', 'calls')
+
+# /api/flowchart/delta answers from a log of per-version rule changes; the
+# oldest versions are dropped once it holds this many
+DELTA_LOG_MAX_RULES = int(os.environ.get('LUMI_DELTA_LOG_RULES', '50000'))
+
+# Background workspace watcher (inotify, falling back to stat polling)
+WATCH_WORKSPACE = os.environ.get('LUMI_WATCH', '1') == '1'
+WATCH_DEBOUNCE = float(os.environ.get('LUMI_WATCH_DEBOUNCE', '0.25'))
+WATCH_MAX_DELAY = 2.0
+WATCH_POLL_INTERVAL = float(os.environ.get('LUMI_WATCH_POLL', '1.0'))
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it is installed.
+
+    Compact output matches the default provider (sorted keys, no whitespace)
+    except that non-ASCII text is written as UTF-8 instead of \\u escapes.
+    Indented output, and anything orjson refuses, goes through the stdlib.
+    """
+
+    ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                      | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson is not None else 0
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and 'indent' not in kwargs:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self.ORJSON_OPTIONS).decode('utf-8')
+            except TypeError:
+                pass  # e.g. integers wider than 64 bits
+        return super().dumps(obj, **kwargs)
+
+
+app.json = FastJSONProvider(app)
+
+# Served at /api/metrics in the Prometheus text format
+METRICS = metrics.Registry()
+HTTP_REQUESTS = METRICS.counter('lumi_http_requests_total', 'HTTP requests by route, method and status.',
+                                ('route', 'method', 'status'))
+HTTP_LATENCY = METRICS.histogram('lumi_http_request_duration_seconds', 'Time to build a response, by route.',
+                                 ('route',))
+HTTP_BYTES = METRICS.counter('lumi_http_response_bytes_total', 'Response body bytes, after compression, by route.',
+                             ('route',))
+SCAN_DURATION = METRICS.histogram('lumi_workspace_scan_seconds',
+                                  'Workspace index updates: full rescans and watcher-driven updates.', ('kind',),
+                                  buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0))
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+# Registered before encode_response, so it runs after it and counts encoded bytes
+@app.after_request
+def record_request(response: Response) -> Response:
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+    HTTP_LATENCY.observe(time.perf_counter() - g.get('request_started', time.perf_counter()), route)
+    HTTP_BYTES.inc(route, amount=response.content_length or 0)
+    return response
+
+
+class RuleStore:
+    """Per-file extraction results persisted in SQLite (WAL mode).
+
+    Rows are keyed on the file path and carry the same (mtime_ns, size,
+    digest) fingerprint as ExtractionCache entries. Rules are stored with
+    their context materialized, so readers need neither the workspace nor
+    the extractor. Rows written by an older extractor (a different
+    VERSION, kept in the database's user_version) are dropped on open.
+    """
+
+    VERSION = 2  # 2: overlapping matches deduplicated, raw counts stored
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            label TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            digest TEXT,
+            results TEXT NOT NULL
+        )
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(self.SCHEMA)
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] != self.VERSION:
+            self._conn.execute('DELETE FROM files')
+            self._conn.execute(f'PRAGMA user_version = {self.VERSION}')
+        self._conn.commit()
+
+    def load(self, prefix: str = ''):
+        """Yield (path, mtime_ns, size, digest, results) for every stored file under a path prefix."""
+        with self._lock:
+            rows = self._conn.execute('SELECT path, mtime_ns, size, digest, results FROM files '
+                                      'WHERE substr(path, 1, ?) = ?', (len(prefix), prefix)).fetchall()
+        for path, mtime_ns, size, digest, results in rows:
+            yield path, mtime_ns, size, digest, load_results(json.loads(results))
+
+    def put(self, path: str, stat: os.stat_result, digest: Optional[str], results: Dict[str, Any]):
+        """Insert or replace one file's results."""
+        stored = {'file': results['file'], 'raw_counts': results['raw_counts']}
+        for category in RULE_CATEGORIES:
+            stored[category] = [serialize_rule(rule) for rule in results[category]]
+        row = (path, results['file'], stat.st_mtime_ns, stat.st_size, digest, json.dumps(stored))
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)', row)
+
+    def delete(self, paths: List[str]):
+        """Forget files that no longer exist."""
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in paths])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ExtractionCache:
+    """Cache of per-file extraction results for one workspace.
+
+    Entries are keyed on the file path and validated against the file's
+    (mtime_ns, size) and, optionally, a hash of its content. With a
+    RuleStore attached, the entries under `scope` are loaded from it up
+    front and every store/eviction is written through, so a restart only
+    re-extracts files that changed while the server was down. Several
+    caches can share one store as long as their scopes don't overlap.
+    """
+
+    def __init__(self, use_hash: bool = False, store: Optional[RuleStore] = None, scope: Optional[Path] = None):
+        self.use_hash = use_hash
+        self.store_backend = store
+        self.scope = scope
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if store is not None:
+            prefix = os.path.join(str(scope), '') if scope is not None else ''
+            for key, mtime_ns, size, digest, results in store.load(prefix):
+                self._entries[key] = {'mtime_ns': mtime_ns, 'size': size, 'digest': digest, 'results': results}
+
+    @staticmethod
+    def digest(content: str) -> str:
+        """Hash file content for change detection."""
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+    def lookup(self, key: str, stat: os.stat_result, count: bool = True) -> Optional[Dict[str, Any]]:
+        """Return cached results if the file's mtime and size are unchanged.
+
+        Pass count=False for a pre-check that is followed by a real lookup,
+        so hits aren't counted twice.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                if count:
+                    self.hits += 1
+                return entry['results']
+        return None
+
+    def lookup_digest(self, key: str, stat: os.stat_result, digest: str) -> Optional[Dict[str, Any]]:
+        """Return cached results if the content hash matches, refreshing the stat key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['digest'] == digest:
+                entry['mtime_ns'] = stat.st_mtime_ns
+                entry['size'] = stat.st_size
+                self.hits += 1
+                results = entry['results']
+            else:
+                return None
+        if self.store_backend is not None:
+            self.store_backend.put(key, stat, digest, results)
+        return results
+
+    def store(self, key: str, stat: os.stat_result, digest: Optional[str], results: Dict[str, Any]):
+        """Cache extraction results for a file."""
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = {
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'digest': digest,
+                'results': results,
+            }
+        if self.store_backend is not None:
+            self.store_backend.put(key, stat, digest, results)
+
+    def fingerprint(self, key: str) -> Optional[tuple]:
+        """Identity of the cached version of a file: content hash if known, else mtime/size."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry['digest']:
+                return (entry['digest'],)
+            return (entry['mtime_ns'], entry['size'])
+
+    def evict_missing(self, live_keys) -> int:
+        """Drop entries for files that no longer exist. Returns the number evicted."""
+        live = set(live_keys)
+        with self._lock:
+            stale = [key for key in self._entries if key not in live]
+            for key in stale:
+                del self._entries[key]
+        if stale and self.store_backend is not None:
+            self.store_backend.delete(stale)
+        return len(stale)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SourceFile:
+    """File content plus a lazily built newline offset index.
+
+    The index only speeds up line_col during extraction; drop_index frees
+    it once a file's rules are built.
+    """
+
+    __slots__ = ('content', '_newlines')
+
+    def __init__(self, content: str):
+        self.content = content
+        self._newlines: Optional[List[int]] = None
+
+    @property
+    def newlines(self) -> List[int]:
+        if self._newlines is None:
+            self._newlines = [m.start() for m in re.finditer('\n', self.content)]
+        return self._newlines
+
+    def drop_index(self):
+        self._newlines = None
+
+    def line_col(self, position: int):
+        """1-based line and column for a character offset."""
+        line = bisect.bisect_left(self.newlines, position)
+        line_start = self.newlines[line - 1] + 1 if line else 0
+        return line + 1, position - line_start + 1
+
+    def line_bounds(self, position: int):
+        """Start and end offsets of the line containing a character offset."""
+        start = self.content.rfind('\n', 0, position) + 1
+        end = self.content.find('\n', position)
+        return start, end if end != -1 else len(self.content)
+
+    def context(self, position: int, chars: int) -> str:
+        """Text around an offset, snapped to line boundaries.
+
+        The ±`chars` window is widened to whole lines when that adds at most
+        `chars` on a side, otherwise the partial line is dropped. The line
+        holding the match itself is only ever cut, never dropped.
+        """
+        start = max(0, position - chars)
+        end = min(len(self.content), position + chars)
+
+        line_start, line_end = self.line_bounds(start)
+        if start - line_start <= chars:
+            start = line_start
+        elif line_end < position:
+            start = line_end + 1
+
+        line_start, line_end = self.line_bounds(end)
+        if line_end - end <= chars:
+            end = line_end
+        elif line_start > position:
+            end = line_start - 1
+
+        return self.content[start:end].strip()
+
+
+class WindowSource(SourceFile):
+    """A window of a larger file, reporting line/column in whole-file terms.
+
+    `offset` is the window's position in the file, `lines_before` the number
+    of newlines before it and `line_start` where the line containing the
+    window's first character starts.
+    """
+
+    __slots__ = ('offset', 'lines_before', 'line_start')
+
+    def __init__(self, content: str, offset: int, lines_before: int, line_start: int):
+        super().__init__(content)
+        self.offset = offset
+        self.lines_before = lines_before
+        self.line_start = line_start
+
+    def line_col(self, position: int):
+        line, column = super().line_col(position)
+        if line == 1:
+            column = self.offset + position - self.line_start + 1
+        return self.lines_before + line, column
+
+
+def intern_text(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+class Rule:
+    """One extracted rule, stored as a slotted record.
+
+    `type` and the context width are class attributes. `source` is the
+    SourceFile the rule was found in and `offset` its match position: the
+    context is cut from the source only when the rule is serialized, and
+    every rule of a file shares the source and the (interned) file name.
+    Rules loaded from a RuleStore or extracted in windows hold their
+    context string in `source` instead.
+    """
+
+    __slots__ = ('file', 'line', 'column', 'source', 'offset')
+    type = ''
+    fields: tuple = ()
+    context_chars = 80
+
+    def __init__(self, file: str, line: int, column: int, source, offset: int):
+        self.file = file
+        self.line = line
+        self.column = column
+        self.source = source
+        self.offset = offset
+
+    def __reduce__(self):
+        return type(self), (self.file, self.line, self.column, self.source, self.offset,
+                            *(getattr(self, field) for field in self.fields))
+
+    @property
+    def id(self) -> str:
+        """Identity of the rule across index versions: its type and location."""
+        return f'{self.type}:{self.file}:{self.line}:{self.column}'
+
+    @property
+    def context(self) -> str:
+        if isinstance(self.source, str):
+            return self.source
+        return self.source.context(self.offset, self.context_chars)
+
+    def detach(self) -> 'Rule':
+        """Materialize the context so the rule no longer holds its source."""
+        self.source = self.context
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        public = {'id': self.id, 'type': self.type}
+        for field in self.fields:
+            public[field] = getattr(self, field)
+        public['file'] = self.file
+        public['line'] = self.line
+        public['column'] = self.column
+        public['context'] = self.context
+        return public
+
+    @staticmethod
+    def from_dict(public: Dict[str, Any]) -> 'Rule':
+        """Rebuild a serialized rule, context included."""
+        cls = RULE_CLASSES[public['type']]
+        return cls(sys.intern(public['file']), public['line'], public['column'], public['context'], 0,
+                   *(public.get(field) for field in cls.fields))
+
+
+class TimeRule(Rule):
+    __slots__ = fields = ('pattern', 'start', 'end')
+    type = 'time_rule'
+    context_chars = 50
+
+    def __init__(self, file, line, column, source, offset, pattern, start, end):
+        Rule.__init__(self, file, line, column, source, offset)
+        self.pattern = pattern
+        self.start = start
+        self.end = end
+
+
+class ModeSwitch(Rule):
+    __slots__ = fields = ('pattern', 'mode')
+    type = 'mode_switch'
+    context_chars = 50
+
+    def __init__(self, file, line, column, source, offset, pattern, mode):
+        Rule.__init__(self, file, line, column, source, offset)
+        self.pattern = pattern
+        self.mode = mode
+
+
+class ConditionalWorkflow(Rule):
+    __slots__ = fields = ('condition', 'action')
+    type = 'conditional_workflow'
+
+    def __init__(self, file, line, column, source, offset, condition, action):
+        Rule.__init__(self, file, line, column, source, offset)
+        self.condition = condition
+        self.action = action
+
+
+class CriticalRule(Rule):
+    __slots__ = fields = ('rule',)
+    type = 'critical_rule'
+
+    def __init__(self, file, line, column, source, offset, rule):
+        Rule.__init__(self, file, line, column, source, offset)
+        self.rule = rule
+
+
+class PermissionGate(CriticalRule):
+    __slots__ = ()
+    type = 'permission_gate'
+
+
+RULE_CLASSES = {cls.type: cls for cls in (TimeRule, ModeSwitch, ConditionalWorkflow, CriticalRule, PermissionGate)}
+
+
+def serialize_rule(rule: Rule) -> Dict[str, Any]:
+    """Public view of a rule, with its context materialized from the source file."""
+    return rule.to_dict()
+
+
+def load_results(stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-file results from their serialized form (see RuleStore)."""
+    results = {'file': sys.intern(stored['file']), 'raw_counts': stored['raw_counts']}
+    for category in RULE_CATEGORIES:
+        results[category] = [Rule.from_dict(rule) for rule in stored[category]]
+    return results
+
+
+class RuleChain:
+    """Read-only concatenation of per-file rule lists.
+
+    The aggregate view of a workspace references each file's list instead
+    of copying every rule pointer into one big list; positions map back to
+    a file by bisecting the lists' start offsets.
+    """
+
+    __slots__ = ('parts', 'starts', 'size')
+
+    def __init__(self):
+        self.parts: List[List[Rule]] = []
+        self.starts: List[int] = []
+        self.size = 0
+
+    def add(self, rules: List[Rule]):
+        if rules:
+            self.parts.append(rules)
+            self.starts.append(self.size)
+            self.size += len(rules)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for rules in self.parts:
+            yield from rules
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.size))]
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('rule index out of range')
+        part = bisect.bisect_right(self.starts, index) - 1
+        return self.parts[part][index - self.starts[part]]
+
+
+# Rule patterns, in output order within each category:
+#   (category, regex, flags, leading keywords, required tail)
+# Every match must start with one of the leading keywords (None means a digit).
+# A required tail is a subpattern that must occur somewhere after the match
+# start for the regex to match at all; it lets the scanner skip lazy DOTALL
+# scans that would otherwise run to the end of the file and fail.
+LINE_FLAGS = re.IGNORECASE
+BLOCK_FLAGS = re.IGNORECASE | re.DOTALL
+
+RULE_PATTERNS = [
+    # Time rules
+    ('time_rules', r'(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})\s*(?:GMT|UTC)?', LINE_FLAGS, None, None),
+    ('time_rules', r'(?:daytime|overnight|nighttime).*?(\d{1,2}:\d{2})', LINE_FLAGS,
+     ('daytime', 'overnight', 'nighttime'), None),
+    ('time_rules', r'(\d{1,2}:\d{2})\s*(?:GMT|UTC)', LINE_FLAGS, None, None),
+
+    # Mode switches
+    ('mode_switches', r'(?:mode|switch|check):?\s*(daytime|overnight|nighttime)', LINE_FLAGS,
+     ('mode', 'switch', 'check'), None),
+    ('mode_switches', r'(?:if|when|while)\s+.*?(\d{1,2}:\d{2})', LINE_FLAGS,
+     ('if', 'when', 'while'), None),
+    ('mode_switches', r'(?:check|determine|decide)\s+mode', LINE_FLAGS,
+     ('check', 'determine', 'decide'), None),
+
+    # Conditional workflows
+    ('conditional_workflows', r'if\s+(.*?):?\s*then\s+(.*?)(?:\.|$|\n)', BLOCK_FLAGS,
+     ('if',), r'then\s'),
+    ('conditional_workflows', r'when\s+(.*?):?\s*(?:do|then|use)\s+(.*?)(?:\.|$|\n)', BLOCK_FLAGS,
+     ('when',), r'(?:do|then|use)\s'),
+    ('conditional_workflows', r'(?:respond|reply|send)\s+.*?(?:when|if|unless)\s+(.*?)(?:\.|$|\n)', BLOCK_FLAGS,
+     ('respond', 'reply', 'send'), r'(?:when|if|unless)\s'),
+    ('conditional_workflows', r'(?:only|never|always)\s+(?:when|if|unless)\s+(.*?)(?:\.|$|\n)', BLOCK_FLAGS,
+     ('only', 'never', 'always'), None),
+
+    # Critical rules
+    ('critical_rules', r'(?:CRITICAL|IMPORTANT|MUST|NEVER|ALWAYS).*?:?\s*(.*?)(?:\.|$|\n)', BLOCK_FLAGS,
+     ('critical', 'important', 'must', 'never', 'always'), None),
+    ('critical_rules', r'⚠️.*?:?\s*(.*?)(?:\.|$|\n)', BLOCK_FLAGS, ('⚠',), None),
+    ('critical_rules', r'NEVER\s+(.*?)(?:\.|$|\n)', BLOCK_FLAGS, ('never',), None),
+    ('critical_rules', r'ALWAYS\s+(.*?)(?:\.|$|\n)', BLOCK_FLAGS, ('always',), None),
+
+    # Permission gates
+    ('permission_gates', r'(?:ask|request|check)\s+first.*?:?\s*(.*?)(?:\.|$|\n)', BLOCK_FLAGS,
+     ('ask', 'request', 'check'), None),
+    ('permission_gates', r'(?:requires|needs)\s+approval.*?:?\s*(.*?)(?:\.|$|\n)', BLOCK_FLAGS,
+     ('requires', 'needs'), None),
+    ('permission_gates', r'(?:before|when)\s+(?:doing|sending|posting)\s+.*?:?\s*(.*?)(?:\.|$|\n)', BLOCK_FLAGS,
+     ('before', 'when'), None),
+]
+
+RULE_CATEGORIES = ('time_rules', 'mode_switches', 'conditional_workflows', 'critical_rules', 'permission_gates')
+
+
+class PatternStats:
+    """Cumulative regex time, match attempts and reported matches per scanner pattern.
+
+    Time is estimated from a sample of attempts (see PATTERN_TIMING_SAMPLE):
+    reading the clock around every attempt would cost more than many of them.
+    """
+
+    def __init__(self, count: int):
+        self.seconds = [0.0] * count
+        self.attempts = [0] * count
+        self.matches = [0] * count
+        self._lock = threading.Lock()
+
+    def add(self, seconds, attempts, matches):
+        with self._lock:
+            for index in range(len(self.seconds)):
+                self.seconds[index] += seconds[index]
+                self.attempts[index] += attempts[index]
+                self.matches[index] += matches[index]
+
+    def snapshot(self) -> tuple:
+        """(seconds, attempts, matches) lists, indexed like the scanner's patterns."""
+        with self._lock:
+            return list(self.seconds), list(self.attempts), list(self.matches)
+
+
+class RuleScanner:
+    """Match every rule pattern against a file in a single trigger pass.
+
+    One combined lookahead regex finds every position where any pattern (or
+    required tail) could start. Each pattern is then tried only at the
+    candidate positions whose first character can begin it, resuming after
+    its previous match exactly like ``re.finditer`` does, so results are
+    identical to running each pattern over the whole file separately.
+    """
+
+    def __init__(self, specs):
+        self.patterns = []
+        self.categories: Dict[str, List[int]] = {}
+        self.dispatch: Dict[str, tuple] = {}
+        tails = {}
+
+        for index, (category, pattern, flags, leads, tail) in enumerate(specs):
+            guard = None
+            if tail is not None:
+                guard = tails.setdefault((tail, flags), re.compile(tail, flags))
+            self.patterns.append((category, re.compile(pattern, flags), guard))
+            self.categories.setdefault(category, []).append(index)
+
+            first_chars = '0123456789' if leads is None else {lead[0] for lead in leads}
+            for char in first_chars:
+                self.dispatch[char] = self.dispatch.get(char, ()) + (index,)
+
+        words = set()
+        for _, _, _, leads, _ in specs:
+            words.update(leads or ())
+        for tail, _ in tails:
+            words.update(re.findall(r'[a-z]+', re.sub(r'\\.', '', tail)))
+        for char in list(self.dispatch):
+            self.dispatch.setdefault(char.upper(), self.dispatch[char])
+
+        alternation = '|'.join(sorted(map(re.escape, words), key=len, reverse=True))
+        first_class = ''.join(sorted({word[0] for word in words}))
+        # Fast path over a lowercased copy; exact case-insensitive fallback otherwise
+        self.trigger = re.compile(rf'(?=[\d{first_class}])(?=\d|{alternation})')
+        self.trigger_ci = re.compile(rf'(?=\d|{alternation})', re.IGNORECASE)
+        self.guards = list(tails.values())
+        self.all_patterns = tuple(range(len(self.patterns)))
+        self.stats = PatternStats(len(self.patterns))
+
+    def _candidates(self, content: str) -> List[int]:
+        """Positions where at least one pattern or tail could start."""
+        # re.IGNORECASE also folds these onto ASCII letters, which str.lower() does not
+        folded = content.lower().replace('ı', 'i').replace('ſ', 's')
+        if len(folded) == len(content):
+            return [m.start() for m in self.trigger.finditer(folded)]
+        return [m.start() for m in self.trigger_ci.finditer(content)]
+
+    def scan(self, content: str, categories=RULE_CATEGORIES) -> Dict[str, List[List[re.Match]]]:
+        """Return, per category, the matches of each of its patterns in order."""
+        return self.scan_window(content, categories)[0]
+
+    def scan_window(self, content: str, categories=RULE_CATEGORIES, start: int = 0,
+                    stop: Optional[int] = None, resume: Optional[List[int]] = None,
+                    safe_end: Optional[int] = None):
+        """Scan one window of a larger text; `scan` is the whole-text case.
+
+        Patterns are tried at candidate positions in [start, stop), each no
+        earlier than its `resume` offset. A match ending past `safe_end` may
+        have been cut short (or ended by `$`) at the window's end, and an
+        attempt that fails on the window's last, unterminated line may have
+        been cut off by it, so when `safe_end` is given neither is final:
+        the pattern stops for this window and resumes from that position
+        in the next one.
+
+        Returns the matches per category and each pattern's resume offset.
+        """
+        active = {index for category in categories for index in self.categories[category]}
+        stop = len(content) if stop is None else stop
+        positions = self._candidates(content)
+        if start:
+            positions = positions[bisect.bisect_left(positions, start):]
+        candidates = positions if stop >= len(content) else positions[:bisect.bisect_left(positions, stop)]
+
+        # Last position each required tail occurs at (anywhere in the window)
+        last_tail = {}
+        for guard in self.guards:
+            last_tail[guard] = -1
+            for position in reversed(positions):
+                if guard.match(content, position):
+                    last_tail[guard] = position
+                    break
+
+        # Attempts past the last newline run into the window's end
+        open_line = content.rfind('\n') + 1 if safe_end is not None else len(content) + 1
+
+        matches = [[] for _ in self.patterns]
+        resume = list(resume) if resume is not None else [start] * len(self.patterns)
+        deferred = [False] * len(self.patterns)
+        dispatch = self.dispatch
+        patterns = self.patterns
+
+        # Every attempt is counted; one in PATTERN_TIMING_SAMPLE is timed
+        calls = [0] * len(self.patterns)
+        spent = [0.0] * len(self.patterns)
+        sample_mask = PATTERN_TIMING_SAMPLE - 1
+        clock = time.perf_counter
+        for position in candidates:
+            for index in dispatch.get(content[position], self.all_patterns):
+                if index not in active or position < resume[index] or deferred[index]:
+                    continue
+                _, regex, guard = patterns[index]
+                if guard is not None and last_tail[guard] <= position:
+                    if position >= open_line:
+                        deferred[index] = True
+                        resume[index] = position
+                    continue
+                calls[index] += 1
+                if calls[index] & sample_mask:
+                    match = regex.match(content, position)
+                else:
+                    started = clock()
+                    match = regex.match(content, position)
+                    spent[index] += clock() - started
+                if match and (safe_end is None or match.end() <= safe_end):
+                    matches[index].append(match)
+                    resume[index] = match.end()
+                elif match or position >= open_line:
+                    deferred[index] = True
+                    resume[index] = position
+
+        self.stats.add([seconds * PATTERN_TIMING_SAMPLE for seconds in spent], calls,
+                       [len(found) for found in matches])
+        resume = [offset if deferred[index] else max(offset, stop) for index, offset in enumerate(resume)]
+        return {
+            category: [matches[index] for index in self.categories[category]]
+            for category in categories
+        }, resume
+
+SCANNER = RuleScanner(RULE_PATTERNS)
+
+RULE_STORE = RuleStore(RULE_DB) if RULE_DB else None
+
+
+def match_specificity(match: re.Match) -> int:
+    """Number of capture groups a match filled with non-blank text."""
+    return sum(1 for group in match.groups() if group and not group.isspace())
+
+
+def dedupe_spans(spans: List[tuple], specificity: Callable[[int], int]) -> List[int]:
+    """Indices of the spans kept when overlapping spans are merged.
+
+    `spans` are (start, end) tuples. Sorted by start they are swept once: a
+    span starting before the current group's end joins it (overlapping or
+    contained), otherwise it opens a new group. Each group keeps its most
+    specific span, `specificity(index)` being asked only for spans that
+    overlap another, then the longest, then the first in input order. Kept
+    indices are returned in input order.
+    """
+    kept = []
+    best, best_key, group_end = -1, None, -1
+    for i in sorted(range(len(spans)), key=lambda i: spans[i][0]):
+        start, end = spans[i]
+        if start >= group_end:
+            if best >= 0:
+                kept.append(best)
+            best, best_key, group_end = i, None, end
+            continue
+        group_end = max(group_end, end)
+        if best_key is None:
+            best_key = (specificity(best), spans[best][1] - spans[best][0], -best)
+        key = (specificity(i), end - start, -i)
+        if key > best_key:
+            best, best_key = i, key
+    if best >= 0:
+        kept.append(best)
+    return sorted(kept)
+
+
+def dedupe_matches(pattern_matches: List[List[re.Match]]) -> List[List[re.Match]]:
+    """One category's per-pattern matches with overlapping matches merged (see dedupe_spans).
+
+    Specificity is the number of capture groups a match filled, so a time
+    range wins over a single time. A pattern's own matches never overlap,
+    so a single matching pattern is returned as is.
+    """
+    if sum(1 for matches in pattern_matches if matches) < 2:
+        return pattern_matches
+    flat = [(index, match) for index, matches in enumerate(pattern_matches) for match in matches]
+    kept: List[List[re.Match]] = [[] for _ in pattern_matches]
+    for i in dedupe_spans([match.span() for _, match in flat], lambda i: match_specificity(flat[i][1])):
+        index, match = flat[i]
+        kept[index].append(match)
+    return kept
 
 
 class RuleExtractor:
     """Extract behavioral rules from markdown files."""
 
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, cache: Optional[ExtractionCache] = None,
+                 recursive: bool = False, include: Optional[List[str]] = None,
+                 exclude: Optional[List[str]] = None):
         self.workspace = workspace
+        self.cache = cache
+        self.recursive = recursive
+        self.include = include or ['*.md']
+        self.exclude = exclude or []
         self.rules = []
-        self.mode_rules = []
-        self.time_rules = []
-        self.critical_rules = []
-        self.permission_rules = []
-        self.workflows = []
+        self.mode_rules = RuleChain()
+        self.time_rules = RuleChain()
+        self.critical_rules = RuleChain()
+        self.permission_rules = RuleChain()
+        self.workflows = RuleChain()
+        self.raw_counts = dict.fromkeys(RULE_CATEGORIES, 0)
 
     def scan_files(self) -> List[Path]:
-        """Scan all .md files in workspace root."""
-        return list(self.workspace.glob('*.md'))
+        """Scan workspace files matching the include globs, in sorted order.
+
+        Only the workspace root is scanned unless `recursive` is set.
+        """
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.workspace):
+            directory = Path(dirpath)
+            if self.recursive:
+                dirnames[:] = sorted(d for d in dirnames if not self._excluded(self.label(directory / d)))
+            else:
+                dirnames[:] = []
+            for filename in filenames:
+                filepath = directory / filename
+                if self.includes(filepath):
+                    files.append(filepath)
+        return sorted(files, key=self.label)
+
+    def scan_dirs(self) -> List[Path]:
+        """Directories whose entries scan_files looks at."""
+        if not self.recursive:
+            return [self.workspace]
+        dirs = []
+        for dirpath, dirnames, _ in os.walk(self.workspace):
+            dirnames[:] = sorted(d for d in dirnames if not self._excluded(self.label(Path(dirpath) / d)))
+            dirs.append(Path(dirpath))
+        return dirs
 
-    def extract_time_based_rules(self, content: str, filename: str) -> List[Dict]:
+    def label(self, filepath: Path) -> str:
+        """Workspace-relative name used as a rule's 'file'."""
+        try:
+            return sys.intern(filepath.relative_to(self.workspace).as_posix())
+        except ValueError:
+            return sys.intern(filepath.name)
+
+    def includes(self, filepath: Path) -> bool:
+        """Whether a path is a file scan_files would return (ignoring existence)."""
+        label = self.label(filepath)
+        if not self.recursive and '/' in label:
+            return False
+        if not any(fnmatch.fnmatch(label, pattern) for pattern in self.include):
+            return False
+        parts = label.split('/')
+        return not any(self._excluded('/'.join(parts[:i])) for i in range(1, len(parts) + 1))
+
+    def _excluded(self, label: str) -> bool:
+        return any(fnmatch.fnmatch(label, pattern) for pattern in self.exclude)
+
+    def extract_time_based_rules(self, content: str, filename: str) -> List[Rule]:
         """Extract time-based rules (e.g., '10:00-23:00 GMT')."""
+        matches = SCANNER.scan(content, ('time_rules',))['time_rules']
+        return self._time_rules(dedupe_matches(matches), SourceFile(content), filename)
+
+    def extract_mode_switches(self, content: str, filename: str) -> List[Rule]:
+        """Extract mode switches (e.g., 'daytime mode', 'overnight mode')."""
+        matches = SCANNER.scan(content, ('mode_switches',))['mode_switches']
+        return self._mode_switches(dedupe_matches(matches), SourceFile(content), filename)
+
+    def extract_conditional_workflows(self, content: str, filename: str) -> List[Rule]:
+        """Extract conditional workflows (if/then structures)."""
+        matches = SCANNER.scan(content, ('conditional_workflows',))['conditional_workflows']
+        return self._conditional_workflows(dedupe_matches(matches), SourceFile(content), filename)
+
+    def extract_critical_rules(self, content: str, filename: str) -> List[Rule]:
+        """Extract critical rules (NEVER, CRITICAL, MUST)."""
+        matches = SCANNER.scan(content, ('critical_rules',))['critical_rules']
+        return self._gate_rules('critical_rule', dedupe_matches(matches), SourceFile(content), filename)
+
+    def extract_permission_gates(self, content: str, filename: str) -> List[Rule]:
+        """Extract permission gates (Ask First, requires approval)."""
+        matches = SCANNER.scan(content, ('permission_gates',))['permission_gates']
+        return self._gate_rules('permission_gate', dedupe_matches(matches), SourceFile(content), filename)
+
+    def _time_rules(self, pattern_matches, source: SourceFile, filename: str) -> List[Rule]:
         rules = []
-        patterns = [
-            r'(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})\s*(?:GMT|UTC)?',
-            r'(?:daytime|overnight|nighttime).*?(\d{1,2}:\d{2})',
-            r'(\d{1,2}:\d{2})\s*(?:GMT|UTC)',
-        ]
-
-        for pattern in patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE)
+        for matches in pattern_matches:
             for match in matches:
-                rules.append({
-                    'type': 'time_rule',
-                    'pattern': match.group(0),
-                    'start': match.group(1) if match.lastindex >= 1 else None,
-                    'end': match.group(2) if match.lastindex >= 2 else None,
-                    'file': filename,
-                    'context': self._get_context(content, match.start(), 50)
-                })
-
+                # Times and modes repeat across a workspace: intern them
+                rules.append(TimeRule(
+                    filename, *source.line_col(match.start()), source, match.start(),
+                    match.group(0),
+                    intern_text(match.group(1)) if match.lastindex >= 1 else None,
+                    intern_text(match.group(2)) if match.lastindex >= 2 else None,
+                ))
         return rules
 
-    def extract_mode_switches(self, content: str, filename: str) -> List[Dict]:
-        """Extract mode switches (e.g., 'daytime mode', 'overnight mode')."""
+    def _mode_switches(self, pattern_matches, source: SourceFile, filename: str) -> List[Rule]:
         rules = []
-        patterns = [
-            r'(?:mode|switch|check):?\s*(daytime|overnight|nighttime)',
-            r'(?:if|when|while)\s+.*?(\d{1,2}:\d{2})',
-            r'(?:check|determine|decide)\s+mode',
-        ]
-
-        for pattern in patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE)
+        for matches in pattern_matches:
             for match in matches:
-                rules.append({
-                    'type': 'mode_switch',
-                    'pattern': match.group(0),
-                    'mode': match.group(1) if (match.lastindex is not None and match.lastindex >= 1) else None,
-                    'file': filename,
-                    'context': self._get_context(content, match.start(), 50)
-                })
-
+                rules.append(ModeSwitch(
+                    filename, *source.line_col(match.start()), source, match.start(),
+                    match.group(0),
+                    intern_text(match.group(1)) if (match.lastindex is not None and match.lastindex >= 1) else None,
+                ))
         return rules
 
-    def extract_conditional_workflows(self, content: str, filename: str) -> List[Dict]:
-        """Extract conditional workflows (if/then structures)."""
+    def _conditional_workflows(self, pattern_matches, source: SourceFile, filename: str) -> List[Rule]:
         rules = []
-        patterns = [
-            r'if\s+(.*?):?\s*then\s+(.*?)(?:\.|$|\n)',
-            r'when\s+(.*?):?\s*(?:do|then|use)\s+(.*?)(?:\.|$|\n)',
-            r'(?:respond|reply|send)\s+.*?(?:when|if|unless)\s+(.*?)(?:\.|$|\n)',
-            r'(?:only|never|always)\s+(?:when|if|unless)\s+(.*?)(?:\.|$|\n)',
-        ]
-
-        for pattern in patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE | re.DOTALL)
+        for matches in pattern_matches:
             for match in matches:
                 condition = match.group(1).strip() if match.lastindex >= 1 else None
                 action = match.group(2).strip() if match.lastindex >= 2 else None
 
-                rules.append({
-                    'type': 'conditional_workflow',
-                    'condition': condition,
-                    'action': action,
-                    'file': filename,
-                    'context': self._get_context(content, match.start(), 80)
-                })
-
+                rules.append(ConditionalWorkflow(
+                    filename, *source.line_col(match.start()), source, match.start(), condition, action))
         return rules
 
-    def extract_critical_rules(self, content: str, filename: str) -> List[Dict]:
-        """Extract critical rules (NEVER, CRITICAL, MUST)."""
+    def _gate_rules(self, rule_type: str, pattern_matches, source: SourceFile, filename: str) -> List[Rule]:
+        """Build critical rules and permission gates, which share a shape."""
+        cls = RULE_CLASSES[rule_type]
         rules = []
-        patterns = [
-            r'(?:CRITICAL|IMPORTANT|MUST|NEVER|ALWAYS).*?:?\s*(.*?)(?:\.|$|\n)',
-            r'⚠️.*?:?\s*(.*?)(?:\.|$|\n)',
-            r'NEVER\s+(.*?)(?:\.|$|\n)',
-            r'ALWAYS\s+(.*?)(?:\.|$|\n)',
-        ]
-
-        for pattern in patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE | re.DOTALL)
+        for matches in pattern_matches:
             for match in matches:
                 rule_text = match.group(1).strip() if match.lastindex >= 1 else match.group(0)
 
-                rules.append({
-                    'type': 'critical_rule',
-                    'rule': rule_text,
-                    'file': filename,
-                    'context': self._get_context(content, match.start(), 80)
-                })
-
+                rules.append(cls(filename, *source.line_col(match.start()), source, match.start(), rule_text))
         return rules
 
-    def extract_permission_gates(self, content: str, filename: str) -> List[Dict]:
-        """Extract permission gates (Ask First, requires approval)."""
-        rules = []
-        patterns = [
-            r'(?:ask|request|check)\s+first.*?:?\s*(.*?)(?:\.|$|\n)',
-            r'(?:requires|needs)\s+approval.*?:?\s*(.*?)(?:\.|$|\n)',
-            r'(?:before|when)\s+(?:doing|sending|posting)\s+.*?:?\s*(.*?)(?:\.|$|\n)',
-        ]
-
-        for pattern in patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE | re.DOTALL)
-            for match in matches:
-                rule_text = match.group(1).strip() if match.lastindex >= 1 else match.group(0)
+    def _build_rules(self, category: str, pattern_matches, source: SourceFile, filename: str) -> List[Rule]:
+        """Rules of one category from its patterns' matches."""
+        if category == 'time_rules':
+            return self._time_rules(pattern_matches, source, filename)
+        if category == 'mode_switches':
+            return self._mode_switches(pattern_matches, source, filename)
+        if category == 'conditional_workflows':
+            return self._conditional_workflows(pattern_matches, source, filename)
+        if category == 'critical_rules':
+            return self._gate_rules('critical_rule', pattern_matches, source, filename)
+        return self._gate_rules('permission_gate', pattern_matches, source, filename)
 
-                rules.append({
-                    'type': 'permission_gate',
-                    'rule': rule_text,
-                    'file': filename,
-                    'context': self._get_context(content, match.start(), 80)
-                })
+    def extract_file_rules(self, content: str, filename: str) -> Dict[str, Any]:
+        """Run every extractor over a file's content in a single scan."""
+        matches = SCANNER.scan(content)
+        source = SourceFile(content)
+        results = {'file': filename, 'raw_counts': {}}
+        for category in RULE_CATEGORIES:
+            results['raw_counts'][category] = sum(len(pattern_matches) for pattern_matches in matches[category])
+            results[category] = self._build_rules(category, dedupe_matches(matches[category]), source, filename)
+        source.drop_index()
+        return results
 
-        return rules
+    def extract_file_streaming(self, f, filename: str, chunk: int = STREAM_CHUNK_CHARS,
+                               overlap: int = STREAM_OVERLAP_CHARS) -> Dict[str, Any]:
+        """Extract rules from an open text file in overlapping windows.
 
-    def _get_context(self, content: str, position: int, chars: int) -> str:
-        """Get context around a match."""
-        start = max(0, position - chars)
-        end = min(len(content), position + chars)
-        return content[start:end].strip()
+        Each window covers `chunk` characters from the earliest position any
+        pattern still has to be tried at, plus `overlap` characters of
+        lookahead and STREAM_CONTEXT_PAD of context before it. Patterns
+        carry their resume offsets from window to window, and a match that
+        runs into the end of a window, or an attempt that fails on its last
+        unterminated line, is re-scanned in the next one; when it starts the
+        window, the lookahead doubles until it fits (or the file ends). The
+        rules equal those of extract_file_rules except for a multi-line
+        match that a window cuts off more than `overlap` characters past
+        its start.
+        Contexts are materialized per window; peak memory is proportional
+        to the window (and the longest match), not the file. Overlapping
+        matches are merged once the whole file is scanned, from their file
+        offsets.
+        """
+        per_pattern: List[List[Rule]] = [[] for _ in SCANNER.patterns]
+        spans: List[List[tuple]] = [[] for _ in SCANNER.patterns]
+        resume = [0] * len(SCANNER.patterns)
+        buf, buf_start = '', 0
+        lines_before, line_start = 0, 0
+        eof = False
+        lookahead = overlap
+
+        while True:
+            base = min(resume)
+            want = base + chunk + lookahead
+            while not eof and buf_start + len(buf) < want:
+                data = f.read(want - buf_start - len(buf))
+                eof = not data
+                buf += data
+
+            drop = base - STREAM_CONTEXT_PAD - buf_start
+            if drop > 0:
+                newlines = buf.count('\n', 0, drop)
+                if newlines:
+                    lines_before += newlines
+                    line_start = buf_start + buf.rindex('\n', 0, drop) + 1
+                buf, buf_start = buf[drop:], buf_start + drop
+
+            end = buf_start + len(buf)
+            stop = end if eof else min(base + chunk, end)
+            matches, local_resume = SCANNER.scan_window(
+                buf, start=base - buf_start, stop=stop - buf_start,
+                resume=[offset - buf_start for offset in resume],
+                safe_end=None if eof else len(buf) - STREAM_MARGIN)
+            resume = [offset + buf_start for offset in local_resume]
+
+            source = WindowSource(buf, buf_start, lines_before, line_start)
+            for category in RULE_CATEGORIES:
+                for index, pattern_matches in zip(SCANNER.categories[category], matches[category]):
+                    if pattern_matches:
+                        rules = self._build_rules(category, [pattern_matches], source, filename)
+                        per_pattern[index].extend(rule.detach() for rule in rules)
+                        spans[index].extend((buf_start + match.start(), buf_start + match.end(),
+                                             match_specificity(match)) for match in pattern_matches)
+
+            if eof and stop >= end:
+                break
+            # No pattern got past `base`: a match starting there ran into the
+            # window's end, so widen the lookahead until it fits
+            lookahead = 2 * max(lookahead, STREAM_MARGIN) if min(resume) == base else overlap
+
+        results = {'file': filename, 'raw_counts': {}}
+        for category in RULE_CATEGORIES:
+            indices = SCANNER.categories[category]
+            rules = [rule for index in indices for rule in per_pattern[index]]
+            results['raw_counts'][category] = len(rules)
+            if sum(1 for index in indices if per_pattern[index]) > 1:
+                flat = [span for index in indices for span in spans[index]]
+                kept = dedupe_spans([span[:2] for span in flat], lambda i: flat[i][2])
+                rules = [rules[i] for i in kept]
+            results[category] = rules
+        return results
+
+    @staticmethod
+    def streams(filepath: Path, stat: Optional[os.stat_result] = None) -> bool:
+        """Whether a file is large enough for windowed extraction."""
+        try:
+            size = stat.st_size if stat is not None else filepath.stat().st_size
+        except OSError:
+            return False
+        return size >= STREAM_MIN_BYTES
+
+    @staticmethod
+    def stream_digest(filepath: Path) -> str:
+        """ExtractionCache.digest of a file's text, computed without reading it whole."""
+        h = hashlib.blake2b(digest_size=16)
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for data in iter(lambda: f.read(STREAM_CHUNK_CHARS), ''):
+                h.update(data.encode('utf-8'))
+        return h.hexdigest()
 
     def process_file(self, filepath: Path) -> Dict[str, Any]:
         """Process a single markdown file and extract all rules."""
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except Exception as e:
-            return {'file': str(filepath), 'error': str(e)}
-
-        filename = filepath.name
-
-        results = {
-            'file': filename,
-            'time_rules': self.extract_time_based_rules(content, filename),
-            'mode_switches': self.extract_mode_switches(content, filename),
-            'conditional_workflows': self.extract_conditional_workflows(content, filename),
-            'critical_rules': self.extract_critical_rules(content, filename),
-            'permission_gates': self.extract_permission_gates(content, filename),
-        }
+        key = str(filepath)
+        stat = None
+        results = None
+
+        if self.cache is not None:
+            # The entry is stored under this stat, taken before the read:
+            # a write that lands mid-read changes the stat and misses next time
+            try:
+                stat = filepath.stat()
+                results = self.cache.lookup(key, stat)
+            except OSError:
+                stat = None
+
+        if results is None:
+            streaming = self.streams(filepath, stat)
+            hashing = stat is not None and self.cache.use_hash
+            content = digest = None
+            try:
+                if streaming:
+                    digest = self.stream_digest(filepath) if hashing else None
+                else:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                    digest = ExtractionCache.digest(content) if hashing else None
+            except Exception as e:
+                return {'file': str(filepath), 'error': str(e)}
+
+            if digest is not None:
+                results = self.cache.lookup_digest(key, stat, digest)
 
-        # Aggregate all rules
-        self.time_rules.extend(results['time_rules'])
-        self.mode_rules.extend(results['mode_switches'])
-        self.workflows.extend(results['conditional_workflows'])
-        self.critical_rules.extend(results['critical_rules'])
-        self.permission_rules.extend(results['permission_gates'])
+            if results is None:
+                if streaming:
+                    try:
+                        with open(filepath, 'r', encoding='utf-8') as f:
+                            results = self.extract_file_streaming(f, self.label(filepath))
+                    except Exception as e:
+                        return {'file': str(filepath), 'error': str(e)}
+                else:
+                    results = self.extract_file_rules(content, self.label(filepath))
+                if stat is not None:
+                    self.cache.store(key, stat, digest, results)
 
+        self.aggregate(results)
         return results
 
+    def aggregate(self, results: Dict[str, Any]):
+        """Append one file's results to the aggregate rule chains."""
+        if 'error' in results:
+            return
+        self.time_rules.add(results['time_rules'])
+        self.mode_rules.add(results['mode_switches'])
+        self.workflows.add(results['conditional_workflows'])
+        self.critical_rules.add(results['critical_rules'])
+        self.permission_rules.add(results['permission_gates'])
+        for category, count in results['raw_counts'].items():
+            self.raw_counts[category] += count
+
     def extract_all(self) -> List[Dict]:
         """Extract rules from all workspace .md files."""
         files = self.scan_files()
-        results = []
 
+        if self.cache is not None:
+            self.cache.evict_missing(str(filepath) for filepath in files)
+
+        return self.extract_files(files)
+
+    def extract_files(self, files: List[Path]) -> List[Dict]:
+        """Extract rules from files, in order, fanning large batches out to a process pool."""
+        pending = self._uncached(files)
+        if len(pending) > 1 and sum(size for _, size in pending) >= PARALLEL_MIN_BYTES:
+            self._extract_parallel([filepath for filepath, _ in pending])
+
+        return [self.process_file(filepath) for filepath in files]
+
+    def _uncached(self, files: List[Path]) -> List[tuple]:
+        """(path, size) of files the cache can't answer from their stat."""
+        pending = []
         for filepath in files:
-            result = self.process_file(filepath)
-            results.append(result)
+            try:
+                stat = filepath.stat()
+            except OSError:
+                continue
+            if self.cache is None or self.cache.lookup(str(filepath), stat, count=False) is None:
+                pending.append((filepath, stat.st_size))
+        return pending
 
-        return results
+    def _extract_parallel(self, files: List[Path]):
+        """Extract files in worker processes and seed the cache with the results.
+
+        Without a cache there is nowhere to put the results, so this is a
+        no-op and process_file extracts serially.
+        """
+        if self.cache is None:
+            return
+        use_hash = self.cache.use_hash
+        jobs = [(str(filepath), self.label(filepath), use_hash) for filepath in files]
+        for key, stat, digest, results, pattern_stats in process_pool().map(_extract_in_worker, jobs, chunksize=4):
+            SCANNER.stats.add(*pattern_stats)
+            if results is not None:
+                self.cache.store(key, stat, digest, results)
 
     def generate_mermaid_flowchart(self) -> str:
         """Generate Mermaid flow chart from extracted rules."""
@@ -273,7 +1267,7 @@ class RuleExtractor:
             lines.append('')
             lines.append('    %% Permission gates')
             for i, rule in enumerate(self.permission_rules[:3]):
-                gate_text = rule.get('rule', 'Ask first')[:30]
+                gate_text = rule.rule[:30]
                 lines.append(f'    Gate{i}["⚠️ {gate_text}..."]:::permission')
 
         # Critical rules
@@ -281,7 +1275,7 @@ class RuleExtractor:
             lines.append('')
             lines.append('    %% Critical rules')
             for i, rule in enumerate(self.critical_rules[:3]):
-                rule_text = rule.get('rule', 'Critical')[:30]
+                rule_text = rule.rule[:30]
                 lines.append(f'    Critical{i}["🔴 {rule_text}..."]:::critical')
 
         # Styling
@@ -309,51 +1303,1467 @@ class RuleExtractor:
         return '\n'.join(lines)
 
 
-@app.route('/')
-def index():
-    """Serve the main dashboard."""
-    return send_from_directory('.', 'index.html')
+MODE_WORDS = ('daytime', 'overnight', 'nighttime')
+RULE_TYPES = {
+    'time_rule': 'time_rules',
+    'mode_switch': 'mode_switches',
+    'conditional_workflow': 'conditional_workflows',
+    'critical_rule': 'critical_rules',
+    'permission_gate': 'permission_gates',
+}
+
+
+def rule_mode(rule: Rule) -> Optional[str]:
+    """Mode a rule belongs to: its 'mode' field, else the first mode word in its text."""
+    if getattr(rule, 'mode', None):
+        return rule.mode.lower()
+    text = ' '.join(getattr(rule, field) or '' for field in rule.fields).lower()
+    for mode in MODE_WORDS:
+        if mode in text:
+            return mode
+    return None
+
+
+class IndexSnapshot:
+    """Immutable state of a RuleIndex, with lookup tables for rule queries.
+
+    Rules are ordered by (category, file, ordinal within the file), which is
+    the order of the aggregate lists. Per category the index records each
+    file's slice of that list and, per mode, the sorted positions of the
+    rules in that mode, so a filtered page starts with a bisect instead of a
+    scan from the beginning.
+    """
+
+    def __init__(self, view: 'RuleExtractor', files: Dict[str, Dict[str, Any]], fingerprint: str,
+                 version: int = 0):
+        self.view = view
+        self.files = files
+        self.results = list(files.values())
+        self.fingerprint = fingerprint
+        self.version = version
+        self.by_type = {
+            'time_rules': view.time_rules,
+            'mode_switches': view.mode_rules,
+            'conditional_workflows': view.workflows,
+            'critical_rules': view.critical_rules,
+            'permission_gates': view.permission_rules,
+        }
+        self.file_labels: Dict[str, List[str]] = {}
+        self.file_starts: Dict[str, List[int]] = {}
+        self.by_file: Dict[str, Dict[str, tuple]] = {}
+        self.by_mode: Dict[str, Dict[str, List[int]]] = {mode: {} for mode in MODE_WORDS}
+
+        for category, rules in self.by_type.items():
+            labels, starts = [], []
+            for position, rule in enumerate(rules):
+                label = rule.file
+                if not labels or labels[-1] != label:
+                    labels.append(label)
+                    starts.append(position)
+                mode = rule_mode(rule)
+                if mode in self.by_mode:
+                    self.by_mode[mode].setdefault(category, []).append(position)
+            self.file_labels[category] = labels
+            self.file_starts[category] = starts
+            for i, label in enumerate(labels):
+                end = starts[i + 1] if i + 1 < len(starts) else len(rules)
+                self.by_file.setdefault(label, {})[category] = (starts[i], end)
+
+    def _position(self, category: str, label: str, ordinal: int) -> int:
+        """Position in a category list of a (file, ordinal) cursor key.
+
+        If the file has since shrunk or gone, this is where the next file starts.
+        """
+        labels = self.file_labels[category]
+        i = bisect.bisect_left(labels, label)
+        if i < len(labels) and labels[i] == label:
+            start, end = self.by_file[label][category]
+            return min(start + ordinal, end)
+        return self.file_starts[category][i] if i < len(labels) else len(self.by_type[category])
+
+    def _key(self, category: str, position: int) -> tuple:
+        """Cursor key of the rule at a position."""
+        label = self.by_type[category][position].file
+        start, _ = self.by_file[label][category]
+        return RULE_CATEGORIES.index(category), label, position - start
+
+    def query(self, types=None, file: Optional[str] = None, mode: Optional[str] = None,
+              cursor: Optional[tuple] = None, limit: int = 50) -> Dict[str, Any]:
+        """One page of rules matching the filters, starting at a cursor key."""
+        start_category, start_label, start_ordinal = cursor or (0, '', 0)
+        page: List[Dict[str, Any]] = []
+        next_key = None
+        total = 0
+
+        for category_index, category in enumerate(RULE_CATEGORIES):
+            if types and category not in types:
+                continue
+
+            low, high = 0, len(self.by_type[category])
+            if file is not None:
+                low, high = self.by_file.get(file, {}).get(category, (0, 0))
+
+            if mode is not None:
+                candidates = self.by_mode.get(mode, {}).get(category, [])
+                lo, hi = bisect.bisect_left(candidates, low), bisect.bisect_left(candidates, high)
+                total += hi - lo
+                positions = candidates[lo:hi]
+            else:
+                total += high - low
+                positions = range(low, high)
+
+            if category_index < start_category or next_key is not None:
+                continue
+            if category_index == start_category:
+                begin = self._position(category, start_label, start_ordinal)
+                positions = positions[bisect.bisect_left(positions, begin):]
+
+            for position in positions:
+                if len(page) == limit:
+                    next_key = self._key(category, position)
+                    break
+                page.append(self.by_type[category][position])
+
+        return {'rules': page, 'next_key': next_key, 'total': total}
+
+
+SEARCH_FIELDS = ('rule', 'condition', 'action', 'context')
+SEARCH_WEIGHTS = {'rule': 3, 'condition': 3, 'action': 3, 'context': 1}
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# bytes.translate table turning a binary string into 0/1 selectors for itertools.compress
+BIT_SELECTORS = bytes.maketrans(b'01', b'\0\1')
+
+
+class _SearchFile:
+    """Searchable text and per-rule trigram postings of one file's rules.
+
+    `texts` holds each rule's lowercased SEARCH_FIELDS, every field
+    repeated as many times as its weight and NUL separated, so one str.count
+    gives a term's weighted occurrence count. `masks` maps a trigram to a
+    bitmask of the rules holding it, and
+    `categories` each rule type to the bitmask of its (contiguous) rules.
+    Query terms never contain whitespace, so only trigrams within a word
+    are indexed, and masks are built per distinct word rather than per
+    trigram of every rule.
+    """
+
+    __slots__ = ('results', 'rules', 'orders', 'texts', 'masks', 'categories', 'everything')
+
+    def __init__(self, results: Dict[str, Any]):
+        self.results = results
+        self.rules: List[Rule] = []
+        self.orders: List[tuple] = []
+        self.texts: List[str] = []
+        self.masks: Dict[str, int] = {}
+        self.categories: Dict[str, int] = {}
+        words: Dict[str, List[int]] = collections.defaultdict(list)
+
+        for order, category in enumerate(RULE_CATEGORIES):
+            first = len(self.rules)
+            for ordinal, rule in enumerate(results[category]):
+                doc = len(self.rules)
+                self.rules.append(rule)
+                self.orders.append((order, rule.file, ordinal))
+                public = serialize_rule(rule)
+                fields = [(public[field].lower(), SEARCH_WEIGHTS[field]) for field in SEARCH_FIELDS if public.get(field)]
+                self.texts.append('\0'.join(text for text, weight in fields for _ in range(weight)))
+                for word in set(' '.join(text for text, _ in fields).split()):
+                    words[word].append(doc)
+            self.categories[category] = (1 << len(self.rules)) - (1 << first)
+        self.everything = (1 << len(self.rules)) - 1
+
+        for word, docs in words.items():
+            mask = sum(map((1).__lshift__, docs))
+            for gram in trigrams(word):
+                self.masks[gram] = self.masks.get(gram, 0) | mask
+
+    def hits(self, mask: int, terms: List[str], limit: int) -> tuple:
+        """How many rules in `mask` contain every term, and the best `limit` of
+        them as (-score, order, rule).
+
+        Scoring runs as map/compress pipelines and a stable sort, keeping the
+        per-rule work in C; only the best rules become tuples.
+        """
+        selectors = format(mask, 'b')[::-1].encode('ascii').translate(BIT_SELECTORS)
+        docs = list(itertools.compress(range(len(self.rules)), selectors))
+        scores = [0] * len(docs)
+        for term in terms:
+            counts = list(map(str.count, map(self.texts.__getitem__, docs), itertools.repeat(term)))
+            docs = list(itertools.compress(docs, counts))
+            scores = list(itertools.compress(map(operator.add, scores, counts), counts))
+        best = sorted(range(len(docs)), key=scores.__getitem__, reverse=True)[:limit]
+        return len(docs), [(-scores[i], self.orders[docs[i]], self.rules[docs[i]]) for i in best]
+
+
+class SearchIndex:
+    """Inverted trigram index for full-text search over extracted rules.
+
+    Postings are kept per rule: each file holds a bitmask of its rules per
+    trigram, and `postings` maps a trigram to the files having any. A query
+    ANDs the masks of every trigram of every term (terms under three
+    characters skip the filter) and scores only the rules left. Files are
+    indexed once per results object: `sync` re-indexes only files that were
+    re-extracted and drops deleted ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files: Dict[str, _SearchFile] = {}
+        self.postings: Dict[str, Set[str]] = {}
+
+    def sync(self, files: Dict[str, Dict[str, Any]]):
+        """Bring the index in line with a RuleIndex's per-file results."""
+        with self._lock:
+            for key in list(self.files):
+                if files.get(key) is not self.files[key].results:
+                    self._remove(key)
+            for key, results in files.items():
+                if key not in self.files and 'error' not in results:
+                    entry = self.files[key] = _SearchFile(results)
+                    for gram in entry.masks:
+                        self.postings.setdefault(gram, set()).add(key)
+
+    def _remove(self, key: str):
+        for gram in self.files.pop(key).masks:
+            posting = self.postings[gram]
+            posting.discard(key)
+            if not posting:
+                del self.postings[gram]
+
+    def search(self, query: str, types=None, limit: int = 20) -> Dict[str, Any]:
+        """Rules containing every term, ranked by weighted term frequency.
+
+        Ties keep rule order (type, file, position). Each result carries
+        [start, end) highlight offsets per field.
+        """
+        terms = list(dict.fromkeys(query.lower().split()))
+        if not terms:
+            return {'total': 0, 'results': []}
+        grams = set().union(*map(trigrams, terms))
+
+        with self._lock:
+            postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+            keys = set.intersection(*postings) if postings else self.files.keys()
+            total = 0
+            hits = []
+            for key in keys:
+                entry = self.files[key]
+                mask = entry.everything
+                if types:
+                    mask = 0
+                    for category in types:
+                        mask |= entry.categories[category]
+                for gram in grams:
+                    if not mask:
+                        break
+                    mask &= entry.masks[gram]
+                if mask:
+                    count, best = entry.hits(mask, terms, limit)
+                    total += count
+                    hits.extend(best)
+
+        results = []
+        for negative_score, _, rule in heapq.nsmallest(limit, hits):
+            public = serialize_rule(rule)
+            results.append({'rule': public, 'score': -negative_score, 'highlights': self._highlights(public, terms)})
+        return {'total': total, 'results': results}
+
+    @staticmethod
+    def _highlights(public: Dict[str, Any], terms: List[str]) -> Dict[str, List[List[int]]]:
+        """[start, end) offsets of each term in the original field text."""
+        highlights = {}
+        for field in SEARCH_FIELDS:
+            original = public.get(field)
+            if not original:
+                continue
+            text = original.lower()
+            if len(text) != len(original):
+                continue  # lowercasing changed offsets
+            spans = []
+            for term in terms:
+                start = text.find(term)
+                while start != -1:
+                    spans.append([start, start + len(term)])
+                    start = text.find(term, start + len(term))
+            if spans:
+                highlights[field] = sorted(spans)
+        return highlights
+
+
+_PROCESS_POOL: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_PROCESS_POOL_LOCK = threading.Lock()
+
+
+def process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Shared extraction pool, started on first use.
+
+    Workers are spawned rather than forked so they don't inherit the
+    server's threads and locks.
+    """
+    global _PROCESS_POOL
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL is None:
+            _PROCESS_POOL = concurrent.futures.ProcessPoolExecutor(
+                max_workers=PARALLEL_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _PROCESS_POOL
+
+
+def _extract_in_worker(job):
+    """Process-pool entry point: `_extract_job` plus the scanner time it took."""
+    before = SCANNER.stats.snapshot()
+    result = _extract_job(job)
+    delta = tuple([now - then for now, then in zip(after, previous)]
+                  for after, previous in zip(SCANNER.stats.snapshot(), before))
+    return result + (delta,)
+
+
+def _extract_job(job):
+    """Stat, read and extract one file in a worker process."""
+    key, label, use_hash = job
+    extractor = RuleExtractor(Path(key).parent)
+    try:
+        stat = os.stat(key)
+        if extractor.streams(Path(key), stat):
+            digest = extractor.stream_digest(Path(key)) if use_hash else None
+            with open(key, 'r', encoding='utf-8') as f:
+                return key, stat, digest, extractor.extract_file_streaming(f, label)
+        with open(key, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except Exception:
+        # Left for process_file to report in the parent
+        return key, None, None, None
+    digest = ExtractionCache.digest(content) if use_hash else None
+    return key, stat, digest, extractor.extract_file_rules(content, label)
+
+
+def rule_map(results: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """A file's serialized rules by id (empty for a missing or unreadable file)."""
+    if results is None or 'error' in results:
+        return {}
+    return {rule.id: serialize_rule(rule) for category in RULE_CATEGORIES for rule in results[category]}
+
+
+def merge_op(first: str, last: str) -> Optional[str]:
+    """Net change of a file or rule from its first and last change in a span of versions."""
+    if last == 'removed':
+        return None if first == 'added' else 'removed'
+    return 'added' if first == 'added' else 'changed'
+
+
+class ChangeLog:
+    """Files and rules each RuleIndex version changed, for delta responses.
+
+    An entry maps the file labels an update touched to 'added', 'changed'
+    or 'removed', and their rule ids likewise, plus a digest of the
+    flowchart after the update. Entries are dropped oldest first once they
+    hold more than `max_rules` rule changes; deltas can then only start at
+    `oldest` or later.
+    """
+
+    def __init__(self, max_rules: int = DELTA_LOG_MAX_RULES):
+        self.max_rules = max_rules
+        self._lock = threading.Lock()
+        self._entries = collections.deque()
+        self._rules = 0
+        self.oldest = 0
+        self._base_digest: Optional[str] = None
+
+    def reset(self, version: int, digest: str):
+        """Forget history: deltas start at `version` from now on."""
+        with self._lock:
+            self._entries.clear()
+            self._rules = 0
+            self.oldest = version
+            self._base_digest = digest
+
+    def record(self, version: int, files: Dict[str, str], rules: Dict[str, Dict[str, str]], digest: str):
+        with self._lock:
+            self._entries.append((version, files, rules, digest))
+            self._rules += sum(len(ops) for ops in rules.values())
+            while self._rules > self.max_rules and self._entries:
+                dropped, _, dropped_rules, dropped_digest = self._entries.popleft()
+                self._rules -= sum(len(ops) for ops in dropped_rules.values())
+                self.oldest, self._base_digest = dropped, dropped_digest
+
+    def since(self, version: int, until: int) -> Optional[tuple]:
+        """Net (files, rules, digest at `version`) from `version` to `until`, None if not retained.
+
+        Only each file's and rule's first and last change matter: a rule
+        added and then removed again within the span is left out.
+        """
+        with self._lock:
+            if version < self.oldest or version > until:
+                return None
+            digest = self._base_digest
+            files: Dict[str, list] = {}
+            rules: Dict[str, Dict[str, list]] = {}
+            for entry_version, entry_files, entry_rules, entry_digest in self._entries:
+                if entry_version <= version:
+                    digest = entry_digest
+                    continue
+                if entry_version > until:
+                    break
+                for label, op in entry_files.items():
+                    files.setdefault(label, [op, op])[1] = op
+                for label, ops in entry_rules.items():
+                    file_rules = rules.setdefault(label, {})
+                    for rule_id, op in ops.items():
+                        file_rules.setdefault(rule_id, [op, op])[1] = op
+
+        net_files = {label: merge_op(*ops) for label, ops in files.items()}
+        net_rules = {label: {rule_id: merge_op(*ops) for rule_id, ops in ops_by_id.items()}
+                     for label, ops_by_id in rules.items()}
+        return ({label: op for label, op in net_files.items() if op},
+                {label: {rule_id: op for rule_id, op in ops.items() if op} for label, ops in net_rules.items()},
+                digest)
+
+
+class RuleIndex:
+    """In-memory rule index for a workspace.
+
+    Readers take `snapshot` (an IndexSnapshot) without locking; updates
+    build a new one from the per-file results and swap it in. Without a
+    watcher, `refresh()` revalidates every file through the extraction
+    cache; with one, `apply_changes()` re-extracts only the paths
+    it reports. Every update that changes the fingerprint bumps the
+    snapshot's version and records its file and rule changes in `changes`;
+    one that doesn't keeps the current snapshot.
+    """
+
+    def __init__(self, workspace: Path, cache: ExtractionCache, recursive: bool = SCAN_RECURSIVE,
+                 include: Optional[List[str]] = None, exclude: Optional[List[str]] = None):
+        self.workspace = workspace
+        self.cache = cache
+        self.recursive = recursive
+        self.include = include if include is not None else SCAN_INCLUDE
+        self.exclude = exclude if exclude is not None else SCAN_EXCLUDE
+        self.watcher: Optional['WorkspaceWatcher'] = None
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self.snapshot = IndexSnapshot(self.new_extractor(), {}, '')
+        self.search = SearchIndex()
+        self.search_active = False
+        self.changes = ChangeLog()
+        self.updated_at: Optional[float] = None
+        self.last_lag: Optional[float] = None
+        self.pending_since: Optional[float] = None
+        self.updates = 0
+
+    @property
+    def view(self) -> RuleExtractor:
+        return self.snapshot.view
+
+    @property
+    def results(self) -> List[Dict[str, Any]]:
+        return self.snapshot.results
+
+    @property
+    def fingerprint(self) -> str:
+        return self.snapshot.fingerprint
+
+    @property
+    def watching(self) -> bool:
+        return self.watcher is not None and self.watcher.is_alive()
+
+    def new_extractor(self) -> RuleExtractor:
+        """Extractor with this index's workspace, cache and scan options."""
+        return RuleExtractor(self.workspace, cache=self.cache, recursive=self.recursive,
+                             include=self.include, exclude=self.exclude)
+
+    def refresh(self):
+        """Rescan the whole workspace; unchanged files come from the cache."""
+        with self._lock:
+            started = time.perf_counter()
+            extractor = self.new_extractor()
+            files = extractor.scan_files()
+            self.cache.evict_missing(str(filepath) for filepath in files)
+            results = extractor.extract_files(files)
+            self._files = {str(filepath): result for filepath, result in zip(files, results)}
+            self._publish(extractor, observed_at=None)
+            SCAN_DURATION.observe(time.perf_counter() - started, 'full')
+
+    def apply_changes(self, paths: Set[str], observed_at: Optional[float] = None):
+        """Re-extract created/modified files and drop deleted ones."""
+        with self._lock:
+            started = time.perf_counter()
+            extractor = self.new_extractor()
+            changed = [Path(key) for key in paths]
+            present = [filepath for filepath in changed if extractor.includes(filepath) and filepath.is_file()]
+            for filepath in changed:
+                self._files.pop(str(filepath), None)
+            for filepath, result in zip(present, extractor.extract_files(present)):
+                self._files[str(filepath)] = result
+
+            # Keep output order identical to a full rescan
+            self._files = dict(sorted(self._files.items(), key=lambda item: extractor.label(Path(item[0]))))
+            self.cache.evict_missing(self._files)
+
+            view = self.new_extractor()
+            for results in self._files.values():
+                view.aggregate(results)
+            self._publish(view, observed_at)
+            SCAN_DURATION.observe(time.perf_counter() - started, 'incremental')
+
+    def _publish(self, view: 'RuleExtractor', observed_at: Optional[float]):
+        now = time.time()
+        previous = self.snapshot
+        fingerprint = self._compute_fingerprint()
+        self.updated_at = now
+        self.last_lag = now - observed_at if observed_at is not None else None
+        self.pending_since = None
+        if fingerprint == previous.fingerprint:
+            # Nothing changed: the current snapshot and search index stay valid
+            return
+
+        # The first version is a timestamp (ms): versions a client got
+        # before a restart fall before the new log and get a full snapshot
+        version = previous.version + 1 if previous.version else int(now * 1000)
+        digest = hashlib.blake2b(view.generate_mermaid_flowchart().encode('utf-8'), digest_size=8).hexdigest()
+        if previous.version == 0:
+            self.changes.reset(version, digest)
+        else:
+            self.changes.record(version, *self._diff(previous.files, view), digest)
+        self.snapshot = IndexSnapshot(view, dict(self._files), fingerprint, version)
+        if self.search_active:
+            # Someone has searched: keep the search index as hot as the rules
+            self.search.sync(self._files)
+        self.updates += 1
+
+    def _diff(self, previous: Dict[str, Dict[str, Any]], view: 'RuleExtractor') -> tuple:
+        """File and rule changes from the previous snapshot's files to the current ones."""
+        files: Dict[str, str] = {}
+        rules: Dict[str, Dict[str, str]] = {}
+        for key in previous.keys() | self._files.keys():
+            before, after = previous.get(key), self._files.get(key)
+            if before is after or before == after:
+                continue
+            label = view.label(Path(key))
+            old, new = rule_map(before), rule_map(after)
+            ops = {rule_id: 'removed' for rule_id in old.keys() - new.keys()}
+            for rule_id, rule in new.items():
+                if rule_id not in old:
+                    ops[rule_id] = 'added'
+                elif old[rule_id] != rule:
+                    ops[rule_id] = 'changed'
+            if before is None or after is None:
+                files[label] = 'added' if before is None else 'removed'
+            elif ops or 'error' in before or 'error' in after:
+                files[label] = 'changed'
+            if ops:
+                rules[label] = ops
+        return files, rules
+
+    def delta(self, since: int, snapshot: Optional[IndexSnapshot] = None) -> Optional[Dict[str, Any]]:
+        """Files and serialized rules changed between version `since` and a snapshot.
+
+        None when the change log no longer reaches back to `since` (or it
+        is ahead of the snapshot): the caller sends a full snapshot instead.
+        """
+        snapshot = snapshot or self.snapshot
+        changes = self.changes.since(since, snapshot.version)
+        if changes is None:
+            return None
+        files, rules, digest = changes
+
+        current = {}
+        for key, results in snapshot.files.items():
+            if 'error' not in results and results['file'] in rules:
+                current[results['file']] = results
+        delta = {
+            'files': {op: sorted(label for label, file_op in files.items() if file_op == op)
+                      for op in ('added', 'changed', 'removed')},
+            'rules': {'added': [], 'changed': [], 'removed': []},
+            'mermaid_digest': digest,
+        }
+        for label in sorted(rules):
+            ops = rules[label]
+            for rule_id, op in ops.items():
+                if op == 'removed':
+                    delta['rules']['removed'].append(rule_id)
+            results = current.get(label)
+            if results is None:
+                continue
+            for category in RULE_CATEGORIES:
+                for rule in results[category]:
+                    op = ops.get(rule.id)
+                    if op in ('added', 'changed'):
+                        delta['rules'][op].append(serialize_rule(rule))
+        return delta
+
+    def _compute_fingerprint(self) -> str:
+        """Hash of every indexed file's identity, in output order."""
+        h = hashlib.blake2b(digest_size=16)
+        for key, results in self._files.items():
+            identity = results['error'] if 'error' in results else self.cache.fingerprint(key)
+            h.update(f'{key}\0{identity}\n'.encode('utf-8', 'surrogateescape'))
+        return h.hexdigest()
+
+    def search_rules(self, query: str, types=None, limit: int = 20) -> Dict[str, Any]:
+        """Full-text search; the search index is built on first use."""
+        if not self.search_active:
+            self.search.sync(self.snapshot.files)
+            self.search_active = True
+        return self.search.search(query, types=types, limit=limit)
+
+    def stats(self) -> Dict[str, Any]:
+        """Index freshness for /api/stats."""
+        now = time.time()
+        return {
+            'watcher': self.watcher.backend_name if self.watching else None,
+            'fresh': self.updated_at is not None and self.pending_since is None,
+            'files_indexed': len(self.results),
+            'updates': self.updates,
+            'last_update': datetime.fromtimestamp(self.updated_at).isoformat() if self.updated_at else None,
+            'age_seconds': round(now - self.updated_at, 3) if self.updated_at else None,
+            'pending_seconds': round(now - self.pending_since, 3) if self.pending_since else 0.0,
+            'last_lag_ms': round(self.last_lag * 1000, 1) if self.last_lag is not None else None,
+            'fingerprint': self.fingerprint,
+            'version': self.snapshot.version,
+        }
+
+
+class _InotifyBackend:
+    """Report changed workspace files using Linux inotify.
+
+    Every directory the extractor scans is watched; directory creation,
+    deletion or renames trigger a full rescan and re-sync the watches.
+    """
+
+    name = 'inotify'
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    EVENT = struct.Struct('iIII')
+    RESCAN = '*'
+
+    def __init__(self, extractor: RuleExtractor):
+        self.extractor = extractor
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches: Dict[int, Path] = {}
+        try:
+            self._sync_watches()
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _sync_watches(self):
+        """Watch every scanned directory not watched yet."""
+        watched = set(self.watches.values())
+        for directory in self.extractor.scan_dirs():
+            if directory in watched:
+                continue
+            wd = self.libc.inotify_add_watch(self.fd, str(directory).encode(), self.WATCH_MASK)
+            if wd < 0:
+                if directory == self.extractor.workspace:
+                    raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+                continue
+            self.watches[wd] = directory
+
+    def wait(self, timeout: float) -> Set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                changed.add(self.RESCAN)
+            elif mask & self.IN_IGNORED:
+                self.watches.pop(wd, None)
+            elif mask & self.IN_ISDIR:
+                if self.extractor.recursive:
+                    changed.add(self.RESCAN)
+            elif wd in self.watches:
+                filepath = self.watches[wd] / name
+                if self.extractor.includes(filepath):
+                    changed.add(str(filepath))
+
+        if self.RESCAN in changed:
+            self._sync_watches()
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    """Report changed workspace files by comparing stat results."""
+
+    name = 'polling'
+
+    def __init__(self, extractor: RuleExtractor, interval: float):
+        self.extractor = extractor
+        self.interval = interval
+        self._snapshot = self._stat_all()
+
+    def _stat_all(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for filepath in self.extractor.scan_files():
+            try:
+                stat = filepath.stat()
+            except OSError:
+                continue
+            snapshot[str(filepath)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._stat_all()
+        changed = {key for key in snapshot.keys() | self._snapshot.keys()
+                   if snapshot.get(key) != self._snapshot.get(key)}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class WorkspaceWatcher(threading.Thread):
+    """Background thread that keeps a RuleIndex in sync with the workspace.
+
+    Changes are debounced: a batch is applied once no new event has arrived
+    for `debounce` seconds, or `max_delay` after its first event, so an
+    editor's burst of writes/renames on save costs one update.
+    """
+
+    def __init__(self, index: RuleIndex, debounce: float = WATCH_DEBOUNCE,
+                 max_delay: float = WATCH_MAX_DELAY, poll_interval: float = WATCH_POLL_INTERVAL):
+        super().__init__(name='workspace-watcher', daemon=True)
+        self.index = index
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+        try:
+            self.backend = _InotifyBackend(index.new_extractor())
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify unavailable ({e}), polling workspace every {poll_interval}s")
+            self.backend = _PollingBackend(index.new_extractor(), poll_interval)
+        self.backend_name = self.backend.name
+
+    def run(self):
+        pending: Set[str] = set()
+        first_seen = last_seen = 0.0
+
+        while not self._stop_event.is_set():
+            if pending:
+                timeout = max(0.0, min(last_seen + self.debounce, first_seen + self.max_delay) - time.time())
+            else:
+                timeout = self.poll_interval
+            changed = self.backend.wait(timeout)
+
+            now = time.time()
+            if changed:
+                if not pending:
+                    first_seen = now
+                    self.index.pending_since = now
+                pending |= changed
+                last_seen = now
+
+            if pending and (now - last_seen >= self.debounce or now - first_seen >= self.max_delay):
+                try:
+                    if _InotifyBackend.RESCAN in pending:
+                        self.index.refresh()
+                    else:
+                        self.index.apply_changes(pending, observed_at=first_seen)
+                except Exception as e:
+                    print(f"⚠️ Rule index update failed: {e}")
+                pending = set()
+
+        self.backend.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def start_watcher(index: RuleIndex) -> 'WorkspaceWatcher':
+    """Build the index once and keep it hot from a background thread."""
+    index.refresh()
+    index.watcher = WorkspaceWatcher(index)
+    index.watcher.start()
+    return index.watcher
+
+
+class AgentIndexes:
+    """A RuleIndex per configured agent, refreshed concurrently.
+
+    Indexes are created the first time an agent is asked for and kept while
+    its workspace stays the same. Each has its own extraction cache (they
+    share the rule store), so refreshing one agent never evicts another's
+    entries. Agents that leave the config are dropped and their watchers
+    stopped; with `watch` set, new ones get a watcher when created.
+    """
+
+    def __init__(self, registry: agents.AgentRegistry, workers: int = REFRESH_WORKERS):
+        self.registry = registry
+        self.workers = workers
+        self.watch = False
+        self._indexes: Dict[str, RuleIndex] = {}
+        self._registry_version: Optional[int] = None
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _sync(self) -> List[agents.Agent]:
+        """Current agents; indexes of removed or moved agents are dropped."""
+        found = self.registry.agents()
+        with self._lock:
+            if self.registry.version != self._registry_version:
+                self._registry_version = self.registry.version
+                live = {agent.id: agent.workspace for agent in found}
+                for agent_id, index in list(self._indexes.items()):
+                    if live.get(agent_id) != index.workspace:
+                        del self._indexes[agent_id]
+                        if index.watcher is not None:
+                            index.watcher.stop()
+        return found
+
+    def _index(self, agent: agents.Agent) -> tuple:
+        """(index, created) for an agent."""
+        with self._lock:
+            index = self._indexes.get(agent.id)
+            if index is not None:
+                return index, False
+            cache = ExtractionCache(use_hash=CACHE_CONTENT_HASH, store=RULE_STORE, scope=agent.workspace)
+            index = self._indexes[agent.id] = RuleIndex(agent.workspace, cache)
+            return index, True
+
+    def get(self, agent_id: Optional[str] = None) -> Optional[RuleIndex]:
+        """Index of an agent (the default agent for None), or None for an unknown agent."""
+        self._sync()
+        agent = self.registry.get(agent_id)
+        if agent is None:
+            return None
+        index, created = self._index(agent)
+        if created and self.watch:
+            start_watcher(index)
+        return index
+
+    def loaded(self) -> Dict[str, RuleIndex]:
+        """Indexes built so far, by agent id (for metrics; creates none)."""
+        with self._lock:
+            return dict(self._indexes)
+
+    def pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='lumi-refresh')
+            return self._pool
+
+    def run(self, func: Callable[[RuleIndex], Any], indexes: List[RuleIndex]) -> list:
+        """func(index) for each index on the refresh pool; a single one runs inline."""
+        if len(indexes) <= 1:
+            return [func(index) for index in indexes]
+        return list(self.pool().map(func, indexes))
+
+    def refresh_all(self) -> List[tuple]:
+        """(agent, index) for every agent, unwatched indexes refreshed concurrently."""
+        found = [(agent, self._index(agent)[0]) for agent in self._sync()]
+        self.run(RuleIndex.refresh, [index for _, index in found if not index.watching])
+        return found
+
+    def start_watchers(self) -> List[tuple]:
+        """Build every agent's index concurrently and keep each hot with a watcher."""
+        self.watch = True
+        found = [(agent, self._index(agent)[0]) for agent in self._sync()]
+        self.run(start_watcher, [index for _, index in found if index.watcher is None])
+        return found
+
+
+AGENT_REGISTRY = agents.AgentRegistry()
+AGENT_INDEXES = AgentIndexes(AGENT_REGISTRY)
+
+
+class ResponseCache:
+    """Small FIFO cache of serialized responses (keyed on index fingerprints or ETags)."""
+
+    def __init__(self, size: int = 4):
+        self.size = size
+        self._entries: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key: tuple, value):
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.size:
+                del self._entries[next(iter(self._entries))]
+
+
+# Keyed on index fingerprints, which differ per agent: room for a few agents' charts
+FLOWCHART_CACHE = ResponseCache(size=16)
+
+# Compressed bodies keyed on (strong ETag, content coding)
+ENCODED_CACHE = ResponseCache(size=16)
+
+
+def negotiate_encoding(available=assets.CONTENT_ENCODINGS) -> Optional[str]:
+    """Preferred available content coding the request accepts, or None."""
+    return assets.negotiate_encoding(request.headers.get('Accept-Encoding', ''), available)
+
+
+@app.after_request
+def encode_response(response: Response) -> Response:
+    """Pretty-print JSON on ?pretty=1; otherwise compress large bodies.
+
+    A strong ETag gets the coding appended, since the encoded bytes differ,
+    and its encoded body is cached so repeat requests skip compression.
+    """
+    if response.direct_passthrough or response.is_streamed or response.status_code != 200:
+        return response
+
+    if request.args.get('pretty') == '1' and response.is_json:
+        response.set_data(app.json.dumps(response.get_json(), indent=2) + '\n')
+        return response
+
+    if not assets.compressible(response.mimetype) or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    encoding = negotiate_encoding() if len(body) >= assets.COMPRESS_MIN_BYTES else None
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        encoded = ENCODED_CACHE.get((etag, encoding))
+        if encoded is None:
+            encoded = assets.compress(body, encoding)
+            ENCODED_CACHE.put((etag, encoding), encoded)
+        response.set_etag(f'{etag}-{encoding}')
+    else:
+        encoded = assets.compress(body, encoding)
+
+    response.set_data(encoded)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def _not_modified(etag: str) -> Optional[Response]:
+    """304 response if the client already holds this ETag, in any content coding."""
+    for candidate in (etag, *(f'{etag}-{encoding}' for encoding in assets.CONTENT_ENCODINGS)):
+        if request.if_none_match.contains(candidate):
+            response = Response(status=304)
+            response.set_etag(candidate)
+            response.headers['Cache-Control'] = 'no-cache'
+            response.vary.add('Accept-Encoding')
+            return response
+    return None
+
+
+def _cached_json(body: bytes, etag: str) -> Response:
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+STATIC_ASSETS = assets.StaticAssetCache()
+
+
+@app.route('/', defaults={'filename': 'index.html'})
+@app.route('/<path:filename>')
+def static_asset(filename: str):
+    """Serve dashboard files from memory with ETag/Last-Modified revalidation."""
+    path = safe_join(str(STATIC_DIR), filename)
+    asset = STATIC_ASSETS.get(path) if path is not None else None
+    if asset is None:
+        abort(404)
+
+    last_modified = int(asset['mtime'])
+    if asset['body'] is None:
+        # Too large to keep: let the WSGI server stream it (sendfile where supported)
+        response = send_file(asset['path'], mimetype=asset['content_type'], etag=asset['etag'],
+                             last_modified=last_modified, max_age=assets.STATIC_MAX_AGE or None,
+                             conditional=True)
+    else:
+        encoding = negotiate_encoding(asset['encoded']) if asset['encoded'] else None
+        response = Response(asset['encoded'][encoding] if encoding else asset['body'],
+                            mimetype=asset['content_type'])
+        response.set_etag(f"{asset['etag']}-{encoding}" if encoding else asset['etag'])
+        response.last_modified = last_modified
+        if asset['encoded']:
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response = response.make_conditional(request)
+
+    if assets.STATIC_MAX_AGE > 0:
+        response.headers['Cache-Control'] = f'public, max-age={assets.STATIC_MAX_AGE}'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def request_index() -> Optional[RuleIndex]:
+    """Rule index of the request's `agent` (the default agent if absent), None if unknown."""
+    return AGENT_INDEXES.get(request.args.get('agent') or None)
+
+
+def unknown_agent():
+    return jsonify({'error': f"Unknown agent: {request.args.get('agent')}"}), 404
+
+
+def current_snapshot(index: RuleIndex) -> IndexSnapshot:
+    """Index snapshot for a request; revalidates files when no watcher keeps it hot."""
+    if not index.watching:
+        index.refresh()
+    return index.snapshot
 
 
 @app.route('/api/flowchart')
 def get_flowchart():
-    """API endpoint to get flow chart and rules."""
-    extractor = RuleExtractor(WORKSPACE)
-    results = extractor.extract_all()
-    mermaid = extractor.generate_mermaid_flowchart()
+    """API endpoint to get flow chart and rules (of the `agent` query parameter)."""
+    index = request_index()
+    if index is None:
+        return unknown_agent()
+    snapshot = current_snapshot(index)
+    fingerprint = snapshot.fingerprint
+
+    etag = f'flowchart-{fingerprint}'
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    cached = FLOWCHART_CACHE.get(('flowchart', fingerprint))
+    if cached:
+        return _cached_json(cached['body'], etag)
+
+    payload = flowchart_payload(snapshot)
+    body = (app.json.dumps(payload) + '\n').encode('utf-8')
+    FLOWCHART_CACHE.put(('flowchart', fingerprint), {'body': body, 'mermaid': payload['mermaid']})
+
+    return _cached_json(body, etag)
+
+
+def flowchart_payload(snapshot: IndexSnapshot, summary: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """/api/flowchart body: chart, rule counts and the first rules of each type."""
+    extractor = snapshot.view
+    payload = dict(summary) if summary is not None else flowchart_summary(snapshot)
+    payload.update({
+        'time_rules': [serialize_rule(r) for r in extractor.time_rules[:10]],  # Limit for performance
+        'mode_switches': [serialize_rule(r) for r in extractor.mode_rules[:10]],
+        'conditional_workflows': [serialize_rule(r) for r in extractor.workflows[:10]],
+        'critical_rules': [serialize_rule(r) for r in extractor.critical_rules[:10]],
+        'permission_gates': [serialize_rule(r) for r in extractor.permission_rules[:10]],
+    })
+    return payload
+
+
+def flowchart_summary(snapshot: IndexSnapshot) -> Dict[str, Any]:
+    """Chart and rule counts of a snapshot, shared by /api/flowchart and its delta."""
+    extractor = snapshot.view
+    return {
+        'mermaid': extractor.generate_mermaid_flowchart(),
+        'files_scanned': len(snapshot.results),
+        'summary': rule_counts(extractor),
+        # Matches before overlapping ones were merged
+        'summary_raw': dict(extractor.raw_counts),
+    }
+
+
+def rule_counts(extractor: RuleExtractor) -> Dict[str, int]:
+    return {
+        'time_rules': len(extractor.time_rules),
+        'mode_switches': len(extractor.mode_rules),
+        'conditional_workflows': len(extractor.workflows),
+        'critical_rules': len(extractor.critical_rules),
+        'permission_gates': len(extractor.permission_rules),
+    }
+
+
+@app.route('/api/flowchart/delta')
+def get_flowchart_delta():
+    """Files and rules changed since a client's index version.
+
+    `since` is the `version` of the client's last response (0 for none).
+    Rules are listed as added, changed (same id, new content) or removed
+    (ids only); `mermaid` is only sent when the chart changed. A `since`
+    the change log no longer covers gets the full /api/flowchart payload
+    with `full: true`, and so does a delta whose body would be larger than
+    that payload's (which carries only the first rules of each type).
+    """
+    try:
+        since = int(request.args.get('since', '0'))
+    except ValueError:
+        return jsonify({'error': 'Invalid since'}), 400
+
+    index = request_index()
+    if index is None:
+        return unknown_agent()
+    snapshot = current_snapshot(index)
+    etag = f'delta-{snapshot.fingerprint}-{since}'
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    summary = flowchart_summary(snapshot)
+    full = flowchart_payload(snapshot, summary)
+    full.update({'version': snapshot.version, 'since': since, 'full': True})
+    body = (app.json.dumps(full) + '\n').encode('utf-8')
+
+    delta = index.delta(since, snapshot) if since > 0 else None
+    if delta is not None:
+        payload = dict(summary)
+        mermaid_digest = hashlib.blake2b(payload['mermaid'].encode('utf-8'), digest_size=8).hexdigest()
+        if mermaid_digest == delta.pop('mermaid_digest'):
+            del payload['mermaid']
+        payload.update(delta)
+        payload.update({'version': snapshot.version, 'since': since, 'full': False})
+        delta_body = (app.json.dumps(payload) + '\n').encode('utf-8')
+        if len(delta_body) < len(body):
+            body = delta_body
+
+    return _cached_json(body, etag)
+
+
+RULES_PAGE_LIMIT = 50
+RULES_MAX_LIMIT = 500
+
+
+def encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    category, label, ordinal = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    return int(category), str(label), int(ordinal)
+
+
+@app.route('/api/rules')
+def get_rules():
+    """Page through extracted rules, filtered by type, file and mode."""
+    types = []
+    for value in request.args.getlist('type'):
+        for name in value.split(','):
+            category = RULE_TYPES.get(name, name)
+            if category not in RULE_CATEGORIES:
+                return jsonify({'error': f'Unknown rule type: {name}'}), 400
+            types.append(category)
+
+    mode = request.args.get('mode')
+    if mode is not None and mode.lower() not in MODE_WORDS:
+        return jsonify({'error': f'Unknown mode: {mode}'}), 400
+
+    try:
+        limit = min(max(int(request.args.get('limit', RULES_PAGE_LIMIT)), 1), RULES_MAX_LIMIT)
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
+
+    index = request_index()
+    if index is None:
+        return unknown_agent()
+    snapshot = current_snapshot(index)
+    etag = f'rules-{snapshot.fingerprint}-' + hashlib.blake2b(
+        request.query_string, digest_size=8).hexdigest()
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    page = snapshot.query(types=types, file=request.args.get('file'),
+                          mode=mode.lower() if mode else None, cursor=cursor, limit=limit)
+    response = jsonify({
+        'rules': [serialize_rule(rule) for rule in page['rules']],
+        'total': page['total'],
+        'next_cursor': encode_cursor(page['next_key']) if page['next_key'] else None,
+    })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+SEARCH_LIMIT = 20
+
+
+@app.route('/api/rules/search')
+def search_rules():
+    """Full-text search over rule, condition, action and context."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing query parameter q'}), 400
+
+    types = []
+    for value in request.args.getlist('type'):
+        for name in value.split(','):
+            category = RULE_TYPES.get(name, name)
+            if category not in RULE_CATEGORIES:
+                return jsonify({'error': f'Unknown rule type: {name}'}), 400
+            types.append(category)
+
+    try:
+        limit = min(max(int(request.args.get('limit', SEARCH_LIMIT)), 1), RULES_MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+
+    index = request_index()
+    if index is None:
+        return unknown_agent()
+    current_snapshot(index)
+    started = time.perf_counter()
+    found = index.search_rules(query, types=types, limit=limit)
 
     return jsonify({
-        'mermaid': mermaid,
-        'files_scanned': len(results),
-        'summary': {
-            'time_rules': len(extractor.time_rules),
-            'mode_switches': len(extractor.mode_rules),
-            'conditional_workflows': len(extractor.workflows),
-            'critical_rules': len(extractor.critical_rules),
-            'permission_gates': len(extractor.permission_rules),
-        },
-        'time_rules': extractor.time_rules[:10],  # Limit for performance
-        'mode_switches': extractor.mode_rules[:10],
-        'conditional_workflows': extractor.workflows[:10],
-        'critical_rules': extractor.critical_rules[:10],
-        'permission_gates': extractor.permission_rules[:10],
+        'query': query,
+        'total': found['total'],
+        'took_ms': round((time.perf_counter() - started) * 1000, 2),
+        'results': found['results'],
     })
 
 
 @app.route('/api/stats')
 def get_stats():
-    """Get quick stats about the dashboard."""
-    extractor = RuleExtractor(WORKSPACE)
-    files = extractor.scan_files()
+    """Get quick stats about the dashboard (for the `agent` query parameter)."""
+    index = request_index()
+    if index is None:
+        return unknown_agent()
+    files = index.new_extractor().scan_files()
 
     return jsonify({
+        'agent': AGENT_REGISTRY.get(request.args.get('agent') or None).id,
         'files_in_workspace': len(files),
-        'workspace_path': str(WORKSPACE),
+        'workspace_path': str(index.workspace),
         'status': 'online',
+        'index': index.stats(),
     })
 
 
+@app.route('/api/agents')
+def get_agents():
+    """Configured agents with their rule counts; unwatched indexes are refreshed concurrently."""
+    found = AGENT_INDEXES.refresh_all()
+    return jsonify({'agents': [
+        {**agent.to_dict(), 'files_scanned': len(index.results), 'summary': rule_counts(index.view),
+         'version': index.snapshot.version, 'watcher': index.watcher.backend_name if index.watching else None}
+        for agent, index in found
+    ]})
+
+
+def cache_counters() -> Dict[str, tuple]:
+    """(hits, misses) of each cache, read at scrape time; extraction sums every agent's."""
+    extraction = [index.cache for index in AGENT_INDEXES.loaded().values()]
+    counters = {'extraction': (sum(cache.hits for cache in extraction), sum(cache.misses for cache in extraction))}
+    for name, cache in (('flowchart', FLOWCHART_CACHE), ('encoded', ENCODED_CACHE), ('static', STATIC_ASSETS)):
+        counters[name] = (cache.hits, cache.misses)
+    return counters
+
+
+def pattern_labels() -> List[tuple]:
+    """(category, index within category) for each scanner pattern."""
+    seen: Dict[str, int] = {}
+    labels = []
+    for category, _, _ in SCANNER.patterns:
+        labels.append((category, str(seen.get(category, 0))))
+        seen[category] = seen.get(category, 0) + 1
+    return labels
+
+
+def pattern_samples(values: List) -> Dict[tuple, float]:
+    return {label: round(value, 6) for label, value in zip(pattern_labels(), values)}
+
+
+METRICS.gauge('lumi_cache_hits_total', 'Cache lookups answered from the cache.', ('cache',),
+              lambda: {(name,): hits for name, (hits, _) in cache_counters().items()}, kind='counter')
+METRICS.gauge('lumi_cache_misses_total', 'Cache lookups that had to compute or load the value.', ('cache',),
+              lambda: {(name,): misses for name, (_, misses) in cache_counters().items()}, kind='counter')
+METRICS.gauge('lumi_cache_hit_ratio', 'Hits over lookups since start.', ('cache',),
+              lambda: {(name,): metrics.hit_ratio(*counts) for name, counts in cache_counters().items()})
+METRICS.gauge('lumi_workspace_files_scanned', 'Files in each agent\'s current rule index.', ('agent',),
+              lambda: {(agent_id,): len(index.results) for agent_id, index in AGENT_INDEXES.loaded().items()})
+METRICS.gauge('lumi_workspace_index_updates_total', 'Rule index rebuilds since start, per agent.', ('agent',),
+              lambda: {(agent_id,): index.updates for agent_id, index in AGENT_INDEXES.loaded().items()},
+              kind='counter')
+METRICS.gauge('lumi_pattern_match_seconds_total', 'Time spent in each rule regex (sampled estimate).', ('category', 'pattern'),
+              lambda: pattern_samples(SCANNER.stats.snapshot()[0]), kind='counter')
+METRICS.gauge('lumi_pattern_attempts_total', 'Positions each rule regex was tried at.', ('category', 'pattern'),
+              lambda: pattern_samples(SCANNER.stats.snapshot()[1]), kind='counter')
+METRICS.gauge('lumi_pattern_matches_total', 'Rule matches found by each rule regex.', ('category', 'pattern'),
+              lambda: pattern_samples(SCANNER.stats.snapshot()[2]), kind='counter')
+METRICS.gauge('lumi_pattern_info', 'Source of each rule regex.', ('category', 'pattern', 'regex'),
+              lambda: {label + (regex.pattern,): 1 for label, (_, regex, _) in zip(pattern_labels(), SCANNER.patterns)})
+
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Request, cache, scan and per-pattern metrics in the Prometheus text format."""
+    return Response(METRICS.render(), content_type=metrics.CONTENT_TYPE)
+
+
+PROFILE_LOCK = threading.Lock()
+
+
+def profile_workspace(extractor: RuleExtractor) -> Dict[str, Any]:
+    """Extract every file and render the flowchart under cProfile.
+
+    Files are processed one at a time in this thread, as extract_all does
+    without a cache, so each file can be timed and the profiler sees all of
+    the work. Per-pattern figures are the scanner's sampled timings over the
+    run, so they also include any other scan running at the same time.
+    """
+    profiler = cProfile.Profile()
+    per_file = []
+    patterns_before = SCANNER.stats.snapshot()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        for filepath in extractor.scan_files():
+            try:
+                size = filepath.stat().st_size
+            except OSError:
+                size = None
+            file_started = time.perf_counter()
+            results = extractor.process_file(filepath)
+            per_file.append({
+                'file': extractor.label(filepath),
+                'ms': round((time.perf_counter() - file_started) * 1000, 2),
+                'bytes': size,
+                'rules': sum(len(results.get(category, ())) for category in RULE_CATEGORIES),
+                **({'error': results['error']} if 'error' in results else {}),
+            })
+        extracted = time.perf_counter()
+        extractor.generate_mermaid_flowchart()
+    finally:
+        profiler.disable()
+    finished = time.perf_counter()
+
+    seconds, attempts, matches = (
+        [now - then for now, then in zip(after, before)]
+        for after, before in zip(SCANNER.stats.snapshot(), patterns_before))
+    patterns = [
+        {'category': category, 'pattern': index, 'regex': regex.pattern, 'ms': round(spent * 1000, 2),
+         'attempts': tried, 'matches': found}
+        for (category, index), (_, regex, _), spent, tried, found
+        in zip(pattern_labels(), SCANNER.patterns, seconds, attempts, matches)
+    ]
+    return {
+        'profiler': profiler,
+        'extract_ms': round((extracted - started) * 1000, 2),
+        'mermaid_ms': round((finished - extracted) * 1000, 2),
+        'files': sorted(per_file, key=lambda entry: entry['ms'], reverse=True),
+        'patterns': sorted(patterns, key=lambda entry: entry['ms'], reverse=True),
+    }
+
+
+def top_functions(stats: pstats.Stats, sort: str, limit: int) -> List[Dict[str, Any]]:
+    """The `limit` costliest functions of a profile."""
+    column = {'calls': 1, 'tottime': 2, 'cumulative': 3}[sort]
+    ranked = sorted(stats.stats.items(), key=lambda item: item[1][column], reverse=True)[:limit]
+    return [
+        {'function': pstats.func_std_string(func), 'calls': calls, 'primitive_calls': primitive,
+         'tottime_ms': round(tottime * 1000, 3), 'cumtime_ms': round(cumtime * 1000, 3)}
+        for func, (primitive, calls, tottime, cumtime, _) in ranked
+    ]
+
+
+def save_profile(stats: pstats.Stats) -> Path:
+    """Dump a profile to PROFILE_DIR, keeping only the newest PROFILE_KEEP dumps."""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.pstats"
+    stats.dump_stats(str(path))
+    for stale in sorted(PROFILE_DIR.glob('profile-*.pstats'))[:-PROFILE_KEEP]:
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+    return path
+
+
+@app.route('/api/debug/profile')
+def debug_profile():
+    """Profile a full extraction and flowchart render of the workspace.
+
+    Query parameters: `sort` (tottime, cumulative or calls), `limit` (rows
+    per table, default 30), `agent` (default agent if absent) and `cached=1`
+    to reuse the index's extraction cache instead of re-extracting every file.
+    """
+    if not PROFILE_TOKEN:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('X-Profile-Token', ''), PROFILE_TOKEN):
+        return jsonify({'error': 'Invalid profile token'}), 403
+
+    sort = request.args.get('sort', 'tottime')
+    if sort not in PROFILE_SORTS:
+        return jsonify({'error': f"sort must be one of {', '.join(PROFILE_SORTS)}"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 30)), 1), 500)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    index = request_index()
+    if index is None:
+        return unknown_agent()
+
+    if not PROFILE_LOCK.acquire(blocking=False):
+        return jsonify({'error': 'A profile is already running'}), 409
+    try:
+        extractor = index.new_extractor()
+        if request.args.get('cached') != '1':
+            extractor.cache = None
+        run = profile_workspace(extractor)
+    finally:
+        PROFILE_LOCK.release()
+
+    stats = pstats.Stats(run['profiler'])
+    payload = {
+        'extract_ms': run['extract_ms'],
+        'mermaid_ms': run['mermaid_ms'],
+        'files_scanned': len(run['files']),
+        'rules': sum(entry['rules'] for entry in run['files']),
+        'sort': sort,
+        'functions': top_functions(stats, sort, limit),
+        'files': run['files'][:limit],
+        'patterns': run['patterns'],
+    }
+    try:
+        payload['dump'] = str(save_profile(stats))
+    except OSError as e:
+        payload['dump_error'] = str(e)
+    return jsonify(payload)
+
+
 if __name__ == '__main__':
     print(f"🦞 Lumi Dashboard API starting...")
-    print(f"📂 Workspace: {WORKSPACE}")
+    for agent in AGENT_REGISTRY.agents():
+        print(f"📂 Agent {agent.id}: {agent.workspace}")
+    if WATCH_WORKSPACE:
+        for agent, index in AGENT_INDEXES.start_watchers():
+            print(f"👀 Watching {agent.id} workspace ({index.watcher.backend_name})")
     app.run(host='0.0.0.0', port=5000, debug=False)
@@ -0,0 +1,130 @@
+"""
+Lumi Dashboard assets
+Response compression and the in-memory static file cache. Shared by api.py
+and server.py; standard library only (brotli is used when installed).
+"""
+
+import gzip
+import mimetypes
+import os
+import threading
+from stat import S_ISREG
+from typing import Any, Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Response compression: bodies of at least this many bytes are sent gzip- or
+# brotli-encoded (brotli only when the module is installed) if the client accepts it
+COMPRESS_MIN_BYTES = int(os.environ.get('LUMI_COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CONTENT_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+# Static assets: files up to this size are held in memory (with compressed
+# variants built once per version); larger ones are sent from disk
+STATIC_CACHE_MAX_BYTES = int(os.environ.get('LUMI_STATIC_CACHE_MAX_BYTES', str(1024 * 1024)))
+STATIC_MAX_AGE = int(os.environ.get('LUMI_STATIC_MAX_AGE', '0'))  # 0: revalidate on every use
+
+
+def compressible(content_type: str) -> bool:
+    """Whether bodies of this media type (without parameters) are worth compressing."""
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def negotiate_encoding(accept_encoding: str, available=CONTENT_ENCODINGS) -> Optional[str]:
+    """Preferred available content coding in an Accept-Encoding header (br, then gzip), or None."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for encoding in CONTENT_ENCODINGS:
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """Encode a body; `best` trades speed for size on bodies compressed once and reused."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if best else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+
+
+class StaticAssetCache:
+    """Dashboard files kept in memory and revalidated by mtime/size.
+
+    Each request costs one stat; a file is re-read, and its gzip/brotli
+    variants rebuilt, only when its mtime or size changes. Files larger than
+    `max_bytes` keep only their metadata and are sent from disk.
+
+    An entry holds `path`, `mtime_ns`, `mtime`, `size`, `content_type`,
+    `etag` (unquoted), `body` (None when too large) and `encoded`, the
+    body per content coding.
+    """
+
+    def __init__(self, max_bytes: int = STATIC_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """Entry for a regular file, or None if it isn't one."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not S_ISREG(stat.st_mode):
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Stat before reading so a write racing the read invalidates the entry
+        try:
+            entry = self._load(path, stat)
+        except OSError:
+            return None
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+    def _load(self, path: str, stat: os.stat_result) -> Dict[str, Any]:
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        entry = {
+            'path': path,
+            'mtime_ns': stat.st_mtime_ns,
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'content_type': content_type,
+            'etag': f'{stat.st_mtime_ns:x}-{stat.st_size:x}',
+            'body': None,
+            'encoded': {},
+        }
+        if stat.st_size > self.max_bytes:
+            return entry
+
+        with open(path, 'rb') as f:
+            entry['body'] = f.read()
+        if len(entry['body']) >= COMPRESS_MIN_BYTES and compressible(content_type):
+            for encoding in CONTENT_ENCODINGS:
+                entry['encoded'][encoding] = compress(entry['body'], encoding, best=True)
+        return entry
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Response encoding benchmark
+Measures payload size and latency of /api/flowchart (Flask test client over a
+synthetic workspace) and /api/settings (server.py on a loopback port with a
+synthetic openclaw.json) for each response format: the previous indented or
+stdlib-encoded JSON, compact JSON, and compact JSON with gzip or brotli.
+
+The rule index is built once up front, as when the workspace watcher runs.
+Flowchart timings are taken with the response caches cleared before every
+request, so they include serialization and compression.
+
+Usage: python3 benchmarks/bench_compression.py [--files N] [--size KB] [--repeat N] [--seed N]
+"""
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import agents  # noqa: E402
+import api  # noqa: E402
+import server  # noqa: E402
+from bench_scanner import synthetic_markdown  # noqa: E402
+
+ENCODINGS = ['identity', 'gzip'] + (['br'] if api.brotli is not None else [])
+
+
+def synthetic_config(seed: int, entries: int = 200) -> dict:
+    """openclaw.json-shaped settings with channels, models and per-skill config."""
+    rng = random.Random(seed)
+    return {
+        'discord': {'channelId': '1234567890', 'guildId': '987654321', 'allowFrom': ['lu', 'lumi']},
+        'telegram': {'chatId': '-100123456', 'parseMode': 'MarkdownV2'},
+        'models': {
+            f'model-{i}': {'provider': rng.choice(['anthropic', 'openai', 'local']), 'contextWindow': 200000,
+                           'maxTokens': rng.choice([4096, 8192, 16384]), 'alias': f'm{i}'}
+            for i in range(entries // 4)
+        },
+        'skills': {
+            f'skill-{i}': {'enabled': rng.random() > 0.2, 'env': {'API_URL': f'https://example.com/{i}'},
+                           'description': 'Synthetic skill entry used for payload measurements.'}
+            for i in range(entries)
+        },
+    }
+
+
+def best_of(repeat: int, func):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def bench_flowchart(config_path: Path, repeat: int):
+    # The synthetic config lists no agents: the default one uses <config dir>/workspace
+    api.AGENT_INDEXES = api.AgentIndexes(agents.AgentRegistry(config_path))
+    index = api.AGENT_INDEXES.get()
+    index.refresh()
+    api.current_snapshot = lambda index: index.snapshot
+    client = api.app.test_client()
+
+    def request(encoding, provider):
+        def run():
+            api.FLOWCHART_CACHE = api.ResponseCache()
+            api.ENCODED_CACHE = api.ResponseCache(size=16)
+            api.app.json = provider
+            return client.get('/api/flowchart', headers={'Accept-Encoding': encoding}).get_data()
+        return run
+
+    rows = []
+    stdlib = api.DefaultJSONProvider(api.app)
+    fast = api.FastJSONProvider(api.app)
+    seconds, body = best_of(repeat, request('identity', stdlib))
+    rows.append(('stdlib json', len(body), seconds))
+    for encoding in ENCODINGS:
+        seconds, body = best_of(repeat, request(encoding, fast))
+        label = 'compact' if encoding == 'identity' else f'compact + {encoding}'
+        rows.append((label + (' (orjson)' if api.orjson is not None else ''), len(body), seconds))
+    api.app.json = fast
+    return rows
+
+
+def bench_settings(config_path: Path, repeat: int):
+    server.OPENCLAW_CONFIG_CACHE = server.JsonFileCache(config_path)
+    httpd = server.PooledHTTPServer(('127.0.0.1', 0), server.LumiDashboardHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1])
+
+    def request(path, encoding):
+        def run():
+            conn.request('GET', path, headers={'Accept-Encoding': encoding})
+            return conn.getresponse().read()
+        return run
+
+    rows = []
+    try:
+        seconds, body = best_of(repeat, request('/api/settings?pretty=1', 'identity'))
+        rows.append(('indent=2 (previous)', len(body), seconds))
+        for encoding in ENCODINGS:
+            seconds, body = best_of(repeat, request('/api/settings', encoding))
+            rows.append(('compact' if encoding == 'identity' else f'compact + {encoding}', len(body), seconds))
+    finally:
+        conn.close()
+        httpd.shutdown()
+        httpd.server_close()
+    return rows
+
+
+def report(title: str, rows):
+    baseline_bytes, baseline_seconds = rows[0][1], rows[0][2]
+    print(title)
+    for label, size, seconds in rows:
+        print(f"  {label:<28} {size / 1024:9.1f} KB ({size / baseline_bytes:6.1%})"
+              f"  {seconds * 1000:8.2f} ms ({seconds / baseline_seconds:6.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=20, help='synthetic workspace files')
+    parser.add_argument('--size', type=float, default=64, help='size of each file in KB')
+    parser.add_argument('--repeat', type=int, default=5, help='requests per format, best time wins')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp) / 'workspace'
+        workspace.mkdir()
+        for i in range(args.files):
+            (workspace / f'NOTES_{i:04d}.md').write_text(
+                synthetic_markdown(int(args.size * 1024), args.seed + i), encoding='utf-8')
+        config_path = Path(tmp) / 'openclaw.json'
+        config_path.write_text(json.dumps(synthetic_config(args.seed), indent=2))
+
+        report(f"/api/flowchart ({args.files} files x {args.size:g} KB)", bench_flowchart(config_path, args.repeat))
+        report("/api/settings", bench_settings(config_path, args.repeat))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Rule index memory benchmark
+Builds the rule index for a synthetic workspace (benchmarks/workspace_gen.py)
+and reports the resident memory it holds once extraction is done:
+
+- index: a RuleIndex as the API server keeps it (extraction cache entries,
+  per-file results and the aggregate view), extracted serially
+- eager: every rule as a dict with its context copied out of the file and
+  the aggregate lists as copies, the layout extraction used to produce
+
+Each layout is built in a fresh process and measured as the growth in
+resident memory over the interpreter with api.py imported, after a full
+garbage collection.
+
+Usage: python3 benchmarks/bench_memory.py [--scale NAME] [--workdir DIR] [--layout NAME ...]
+"""
+
+import argparse
+import concurrent.futures
+import gc
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import api  # noqa: E402
+from workspace_gen import SCALES, generate_workspace  # noqa: E402
+
+MB = 1024 * 1024
+LAYOUTS = ('index', 'eager')
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB
+    except OSError:
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / MB
+
+
+def build_index(workspace: Path):
+    api.PARALLEL_MIN_BYTES = float('inf')
+    index = api.RuleIndex(workspace, api.ExtractionCache())
+    index.refresh()
+    return index, sum(len(rules) for rules in index.snapshot.by_type.values())
+
+
+def build_eager(workspace: Path):
+    extractor = api.RuleExtractor(workspace)
+    per_file = []
+    aggregate = {category: [] for category in api.RULE_CATEGORIES}
+    for filepath in extractor.scan_files():
+        content = filepath.read_text(encoding='utf-8')
+        results = extractor.extract_file_rules(content, extractor.label(filepath))
+        eager = {'file': results['file']}
+        for category in api.RULE_CATEGORIES:
+            eager[category] = [api.serialize_rule(rule) for rule in results[category]]
+            aggregate[category].extend(eager[category])
+        per_file.append(eager)
+        del content, results
+    return (per_file, aggregate), sum(len(rules) for rules in aggregate.values())
+
+
+def measure_layout(layout: str, workspace: str) -> dict:
+    """Memory held by one layout; runs in its own process."""
+    gc.collect()
+    baseline = rss_mb()
+    started = time.perf_counter()
+    held, rules = (build_index if layout == 'index' else build_eager)(Path(workspace))
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    grown = rss_mb() - baseline
+    del held
+    return {
+        'rules': rules,
+        'rss_mb': round(grown, 1),
+        'bytes_per_rule': round(grown * MB / rules) if rules else 0,
+        'build_s': round(elapsed, 2),
+    }
+
+
+def run_isolated(func, *args):
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(func, *args).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--workdir', type=Path, help='keep generated workspaces here and reuse them')
+    parser.add_argument('--layout', choices=LAYOUTS, action='append', help='layout to measure, repeatable')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    files, total_bytes = SCALES[args.scale]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = (args.workdir or Path(tmp)) / f'{args.scale}-{args.seed}'
+        generate_workspace(workspace, files, total_bytes, args.seed)
+        print(f"{args.scale}: {files} files, {total_bytes / MB:.1f} MB")
+        for layout in args.layout or LAYOUTS:
+            result = results[layout] = run_isolated(measure_layout, layout, str(workspace))
+            print(f"  {layout:<6} {result['rules']:>9} rules  {result['rss_mb']:8.1f} MB RSS"
+                  f"  {result['bytes_per_rule']:5d} B/rule  built in {result['build_s']:.2f} s")
+
+    if 'index' in results and 'eager' in results and results['eager']['rss_mb']:
+        saved = 1 - results['index']['rss_mb'] / results['eager']['rss_mb']
+        print(f"  index holds {saved:.0%} less than eager dicts")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
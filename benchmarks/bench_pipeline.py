@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Rule extraction pipeline benchmark
+Generates synthetic workspaces (benchmarks/workspace_gen.py) at one or more
+scales and measures, per scale:
+
+- scanner throughput per rule category and for all categories together
+- /api/flowchart through the Flask test client: a cold request (empty
+  extraction cache), warm requests that revalidate every file (no watcher),
+  conditional requests answered 304, and a rebuild of the response from a
+  hot index (watcher running, response caches cleared)
+- peak RSS of the measuring process and of its extraction workers
+
+Each scale runs in a fresh process so peak memory is not inherited from the
+previous one. Adversarial inputs (workspace_gen.ADVERSARIAL_KINDS) are scanned
+separately and reported as MB/s per kind.
+
+Results can be saved as a JSON baseline and compared against a later run;
+--fail-on-regression exits non-zero when a metric is worse than the
+baseline by more than --threshold.
+
+Usage: python3 benchmarks/bench_pipeline.py [--scale NAME ...] [--workdir DIR]
+                                            [--save FILE] [--compare FILE]
+"""
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import agents  # noqa: E402
+import api  # noqa: E402
+from workspace_gen import ADVERSARIAL_KINDS, SCALES, adversarial_markdown, generate_workspace  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def best_of(repeat: int, func):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(who).ru_maxrss * scale / MB
+
+
+def category_throughput(workspace: Path) -> dict:
+    """MB/s of the scanner per category, one file in memory at a time."""
+    seconds = dict.fromkeys(api.RULE_CATEGORIES + ('all',), 0.0)
+    total_bytes = 0
+    for filepath in sorted(workspace.glob('*.md')):
+        content = filepath.read_text(encoding='utf-8')
+        total_bytes += len(content.encode('utf-8'))
+        for category in api.RULE_CATEGORIES:
+            started = time.perf_counter()
+            api.SCANNER.scan(content, (category,))
+            seconds[category] += time.perf_counter() - started
+        started = time.perf_counter()
+        api.SCANNER.scan(content)
+        seconds['all'] += time.perf_counter() - started
+    return {f'{name}_mb_s': round(total_bytes / MB / elapsed, 2) for name, elapsed in seconds.items() if elapsed}
+
+
+def use_workspace(workspace: Path) -> 'api.RuleIndex':
+    """Point the API at an openclaw.json whose only agent uses this workspace."""
+    config_path = workspace.parent / f'{workspace.name}.openclaw.json'
+    config_path.write_text(json.dumps({'agents': {'list': [{'id': 'bench', 'workspace': str(workspace)}]}}))
+    api.AGENT_INDEXES = api.AgentIndexes(agents.AgentRegistry(config_path))
+    return api.AGENT_INDEXES.get()
+
+
+def flowchart_latency(workspace: Path, repeat: int) -> dict:
+    """Cold, revalidated, 304 and hot-index /api/flowchart timings."""
+    index = use_workspace(workspace)
+    api.FLOWCHART_CACHE = api.ResponseCache()
+    api.ENCODED_CACHE = api.ResponseCache(size=16)
+    client = api.app.test_client()
+
+    started = time.perf_counter()
+    response = client.get('/api/flowchart')
+    cold = time.perf_counter() - started
+    payload = response.get_json()
+    etag = response.headers['ETag']
+
+    revalidate, _ = best_of(repeat, lambda: client.get('/api/flowchart').get_data())
+    not_modified, _ = best_of(repeat, lambda: client.get('/api/flowchart', headers={'If-None-Match': etag}).status_code)
+
+    snapshot = index.snapshot
+    original = api.current_snapshot
+    api.current_snapshot = lambda index: snapshot
+
+    def rebuild():
+        api.FLOWCHART_CACHE = api.ResponseCache()
+        api.ENCODED_CACHE = api.ResponseCache(size=16)
+        return client.get('/api/flowchart').get_data()
+
+    try:
+        hot, _ = best_of(repeat, rebuild)
+    finally:
+        api.current_snapshot = original
+
+    return {
+        'files': payload['files_scanned'],
+        'rules': sum(payload['summary'].values()),
+        'cold_ms': round(cold * 1000, 1),
+        'revalidate_ms': round(revalidate * 1000, 2),
+        'not_modified_ms': round(not_modified * 1000, 2),
+        'hot_rebuild_ms': round(hot * 1000, 2),
+    }
+
+
+def measure_scale(workspace: str, repeat: int) -> dict:
+    """Everything measured for one workspace; runs in its own process."""
+    workspace = Path(workspace)
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    result = flowchart_latency(workspace, repeat)
+    if api._PROCESS_POOL is not None:
+        # Reap the extraction workers so their peak shows up in RUSAGE_CHILDREN
+        api._PROCESS_POOL.shutdown()
+        api._PROCESS_POOL = None
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    result['baseline_rss_mb'] = round(baseline, 1)
+    result['worker_peak_rss_mb'] = round(peak_rss_mb(resource.RUSAGE_CHILDREN), 1)
+    result.update(category_throughput(workspace))
+    result['total_s'] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def measure_adversarial(size_bytes: int, repeat: int, seed: int) -> dict:
+    results = {}
+    for kind in ADVERSARIAL_KINDS:
+        content = adversarial_markdown(kind, size_bytes, seed)
+        megabytes = len(content.encode('utf-8')) / MB
+        seconds, _ = best_of(repeat, lambda: api.SCANNER.scan(content))
+        results[kind] = {'scan_mb_s': round(megabytes / seconds, 2)}
+    return results
+
+
+def run_isolated(func, *args):
+    """Run func in a fresh interpreter so its peak RSS is its own."""
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(func, *args).result()
+
+
+def flatten(results: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        else:
+            flat[name] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Print per-metric changes and return the names of regressed metrics.
+
+    Throughput (`_mb_s`) regresses when it drops; timings and memory when
+    they grow. Other values (file and rule counts) are reported if they differ.
+    """
+    old, new = flatten(baseline['results']), flatten(current['results'])
+    regressions = []
+    print(f"\nCompared with baseline from {baseline['meta'].get('date', '?')} ({baseline['meta'].get('commit', '?')}):")
+    for name in sorted(old.keys() & new.keys()):
+        before, after = old[name], new[name]
+        if name.endswith(('_ms', '_s', '_mb', '_mb_s')):
+            if not before:
+                continue
+            change = (after - before) / before
+            worse = -change if name.endswith('_mb_s') else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions.append(name)
+            elif worse < -threshold:
+                flag = '  improved'
+            print(f"  {name:<48} {before:>10} -> {after:>10} ({change:+7.1%}){flag}")
+        elif before != after:
+            print(f"  {name:<48} {before!s:>10} -> {after!s:>10}  CHANGED")
+    for name in sorted(old.keys() - new.keys()):
+        print(f"  {name:<48} missing from this run")
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=5).stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def report_scale(name: str, files: int, total_bytes: int, result: dict):
+    print(f"{name}: {files} files, {total_bytes / MB:.1f} MB, {result['rules']} rules")
+    print(f"  /api/flowchart cold {result['cold_ms']:10.1f} ms   revalidate {result['revalidate_ms']:9.2f} ms"
+          f"   304 {result['not_modified_ms']:7.2f} ms   hot rebuild {result['hot_rebuild_ms']:8.2f} ms")
+    print(f"  peak RSS {result['peak_rss_mb']:.1f} MB (interpreter {result['baseline_rss_mb']:.1f} MB,"
+          f" workers {result['worker_peak_rss_mb']:.1f} MB)")
+    throughput = '  '.join(f"{category} {result[f'{category}_mb_s']:.1f}"
+                           for category in api.RULE_CATEGORIES + ('all',) if f'{category}_mb_s' in result)
+    print(f"  scanner MB/s: {throughput}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, action='append',
+                        help='workspace scale, repeatable (default: tiny and small)')
+    parser.add_argument('--workdir', type=Path, help='keep generated workspaces here and reuse them')
+    parser.add_argument('--repeat', type=int, default=5, help='requests per warm measurement, best time wins')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--adversarial-every', type=int, default=0,
+                        help='make every Nth workspace file adversarial')
+    parser.add_argument('--adversarial-size', type=float, default=256, help='size of each adversarial input in KB')
+    parser.add_argument('--in-process', action='store_true', help='measure scales in this process (shared peak RSS)')
+    parser.add_argument('--save', type=Path, help='write results as a JSON baseline')
+    parser.add_argument('--compare', type=Path, help='compare results with a saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.15, help='relative change counted as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    scales = args.scale or ['tiny', 'small']
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or Path(tmp)
+        for name in scales:
+            files, total_bytes = SCALES[name]
+            workspace = workdir / f'{name}-{args.seed}'
+            generate_workspace(workspace, files, total_bytes, args.seed, args.adversarial_every)
+            if args.in_process:
+                result = measure_scale(str(workspace), args.repeat)
+            else:
+                result = run_isolated(measure_scale, str(workspace), args.repeat)
+            report_scale(name, files, total_bytes, result)
+            results[name] = result
+
+    results['adversarial'] = measure_adversarial(int(args.adversarial_size * 1024), args.repeat, args.seed)
+    print(f"adversarial inputs ({args.adversarial_size:g} KB each), scanner MB/s:")
+    for kind, result in results['adversarial'].items():
+        print(f"  {kind:<20} {result['scan_mb_s']:8.2f}")
+
+    current = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': multiprocessing.cpu_count(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'adversarial_every': args.adversarial_every,
+            'adversarial_size_kb': args.adversarial_size,
+        },
+        'results': results,
+    }
+    if args.save:
+        args.save.write_text(json.dumps(current, indent=2) + '\n')
+        print(f"\nBaseline written to {args.save}")
+
+    regressions = []
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), current, args.threshold)
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
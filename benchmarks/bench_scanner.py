@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Rule scanner benchmark
+Compares the single-pass RuleScanner against running each rule pattern with
+its own re.finditer pass (the previous extraction strategy) on synthetic
+markdown, checks that both produce identical rules and reports MB/s.
+
+With --adversarial, the file ends in prose full of "when"/"send" that is
+never followed by a then/do/use or when/if/unless clause, which makes the
+lazy DOTALL workflow patterns scan to the end of the file from every hit.
+
+Windowed extraction (extract_file_streaming, with small windows) is checked
+against a whole-file extraction of the same input and of WINDOW_CASES.
+
+Usage: python3 benchmarks/bench_scanner.py [--size MB] [--repeat N] [--seed N] [--adversarial]
+"""
+
+import argparse
+import io
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api import RULE_CATEGORIES, RULE_PATTERNS, SCANNER, RuleExtractor, SourceFile, serialize_rule  # noqa: E402
+
+SNIPPETS = [
+    "## Heartbeat\nDuring daytime (10:00-23:00 GMT) check Discord for new messages.",
+    "Overnight mode runs 23:00 - 10:00 UTC and works through the task queue.",
+    "NEVER share private data. ALWAYS log social activity to memory.",
+    "CRITICAL: do not run destructive commands without asking.",
+    "If the queue is empty then generate a new queue from existing projects.",
+    "When a calendar event is under 2h away, then notify the user.",
+    "Reply to mentions only when the user is tagged directly.",
+    "⚠️ Important: requires approval before posting to public channels.",
+    "Ask first: before sending emails, tweets or anything public.",
+    "check mode: daytime. Determine mode at the start of every heartbeat.",
+    "- [ ] Review the notes when there is time\n- [x] Clean up the workspace",
+    "Lu likes short summaries when the day was busy and long ones on weekends",
+    "Some plain prose about the project, the tooling and the general plan.",
+]
+
+
+ADVERSARIAL_WORDS = "when send the agent notes ready tasks queue about later".split()
+
+
+def synthetic_markdown(size_bytes: int, seed: int, adversarial: bool = False) -> str:
+    """Generate OpenClaw-style markdown of roughly the requested size."""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    body_bytes = size_bytes * 9 // 10 if adversarial else size_bytes
+    while total < body_bytes:
+        snippet = rng.choice(SNIPPETS)
+        parts.append(snippet)
+        total += len(snippet) + 1
+    while total < size_bytes:
+        line = ' '.join(rng.choice(ADVERSARIAL_WORDS) for _ in range(12))
+        parts.append(line)
+        total += len(line) + 1
+    return '\n'.join(parts)
+
+
+# Windows used for the streaming check, and inputs whose matches a window cuts
+# off: a mode switch on one line longer than the window and its overlap
+WINDOW_CHUNK = 4096
+WINDOW_OVERLAP = 2048
+WINDOW_CASES = [
+    'a ' * 1000 + 'if ' + 'x' * 6000 + ' 10:00\n',
+    'a ' * 1000 + 'if ' + 'x' * 20000 + ' 10:00\n',
+]
+
+
+def legacy_scan(content: str):
+    """One re.finditer pass per pattern, as extraction used to work."""
+    matches = {category: [] for category in RULE_CATEGORIES}
+    for category, pattern, flags, _, _ in RULE_PATTERNS:
+        matches[category].append(list(re.finditer(pattern, content, flags)))
+    return matches
+
+
+def build_rules(extractor: RuleExtractor, matches, content: str):
+    source = SourceFile(content)
+    rules = {
+        'time_rules': extractor._time_rules(matches['time_rules'], source, 'BENCH.md'),
+        'mode_switches': extractor._mode_switches(matches['mode_switches'], source, 'BENCH.md'),
+        'conditional_workflows': extractor._conditional_workflows(matches['conditional_workflows'], source, 'BENCH.md'),
+        'critical_rules': extractor._gate_rules('critical_rule', matches['critical_rules'], source, 'BENCH.md'),
+        'permission_gates': extractor._gate_rules('permission_gate', matches['permission_gates'], source, 'BENCH.md'),
+    }
+    return {category: [serialize_rule(rule) for rule in rules[category]] for category in rules}
+
+
+def windowed_identical(extractor: RuleExtractor, content: str) -> bool:
+    """Whether extracting in small windows gives the rules of a whole-file extraction."""
+    whole = extractor.extract_file_rules(content, 'BENCH.md')
+    windowed = extractor.extract_file_streaming(io.StringIO(content), 'BENCH.md',
+                                                chunk=WINDOW_CHUNK, overlap=WINDOW_OVERLAP)
+    return all([serialize_rule(rule) for rule in whole[category]] ==
+               [serialize_rule(rule) for rule in windowed[category]] for category in RULE_CATEGORIES)
+
+
+def best_of(repeat: int, func, *args):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=float, default=1.0, help='synthetic file size in MB')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per engine, best time wins')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--adversarial', action='store_true', help='append backtracking-heavy prose')
+    args = parser.parse_args()
+
+    content = synthetic_markdown(int(args.size * 1024 * 1024), args.seed, args.adversarial)
+    megabytes = len(content.encode('utf-8')) / (1024 * 1024)
+    extractor = RuleExtractor(Path('.'))
+
+    legacy_time, legacy_matches = best_of(args.repeat, legacy_scan, content)
+    scanner_time, scanner_matches = best_of(args.repeat, SCANNER.scan, content)
+
+    legacy_rules = build_rules(extractor, legacy_matches, content)
+    scanner_rules = build_rules(extractor, scanner_matches, content)
+    identical = json.dumps(legacy_rules, sort_keys=True) == json.dumps(scanner_rules, sort_keys=True)
+    windowed = all(windowed_identical(extractor, text) for text in [content] + WINDOW_CASES)
+
+    print(f"Input: {megabytes:.2f} MB synthetic markdown")
+    print(f"  per-pattern finditer: {legacy_time * 1000:9.1f} ms  {megabytes / legacy_time:8.2f} MB/s")
+    print(f"  single-pass scanner:  {scanner_time * 1000:9.1f} ms  {megabytes / scanner_time:8.2f} MB/s")
+    print(f"  speedup: {legacy_time / scanner_time:.1f}x")
+    print(f"  rules: {sum(len(v) for v in scanner_rules.values())}  identical output: {identical}")
+    print(f"  windowed extraction ({WINDOW_CHUNK} + {WINDOW_OVERLAP} chars) identical: {windowed}")
+
+    return 0 if identical and windowed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
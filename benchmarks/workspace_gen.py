@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Synthetic OpenClaw workspace generator
+Writes a workspace of markdown files built from the same snippets as
+bench_scanner.py, with file sizes spread around the mean the way real
+workspaces mix short notes with a few long logs. Adversarial files target
+the lazy DOTALL patterns and the digit-triggered time patterns.
+
+A manifest records the parameters, so an existing workspace generated with
+the same parameters is reused instead of rewritten. Only directories holding
+a manifest are rewritten, and only their NOTE_*.md files are replaced; a
+non-empty directory without one is left alone.
+
+Usage: python3 benchmarks/workspace_gen.py DIR [--scale NAME | --files N --size MB] [--seed N]
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_scanner import ADVERSARIAL_WORDS, synthetic_markdown  # noqa: E402
+
+# name: (files, total bytes)
+SCALES = {
+    'tiny': (10, 100 * 1024),
+    'small': (100, 10 * 1024 * 1024),
+    'medium': (1000, 100 * 1024 * 1024),
+    'large': (10000, 1024 * 1024 * 1024),
+}
+
+MANIFEST = '.bench-manifest.json'
+
+
+def adversarial_markdown(kind: str, size_bytes: int, seed: int) -> str:
+    """Backtracking-heavy input of one kind.
+
+    - unterminated-when: "when"/"send" prose never followed by do/then/use
+      or when/if/unless, so the workflow patterns scan to the end from every hit
+    - if-without-then: "if" clauses with no "then" anywhere after them
+    - long-lines: CRITICAL/NEVER keywords on very long lines with no period,
+      so every critical match runs to the end of its line
+    - digit-runs: log lines dense in digits, each one a time-pattern candidate
+    """
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_bytes:
+        if kind == 'unterminated-when':
+            line = ' '.join(rng.choice(ADVERSARIAL_WORDS) for _ in range(12))
+        elif kind == 'if-without-then':
+            line = 'if ' + ' '.join(rng.choice(('the', 'queue', 'is', 'empty', 'or', 'busy')) for _ in range(12))
+        elif kind == 'long-lines':
+            words = [rng.choice(('CRITICAL', 'NEVER', 'always', 'notes', 'queue', 'must', 'agent')) for _ in range(2000)]
+            line = ' '.join(words)
+        elif kind == 'digit-runs':
+            line = (f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:'
+                    f'{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} id={rng.randint(0, 10**9)} status=200 ok')
+        else:
+            raise ValueError(f'Unknown adversarial kind: {kind}')
+        parts.append(line)
+        total += len(line) + 1
+    return '\n'.join(parts)
+
+
+ADVERSARIAL_KINDS = ('unterminated-when', 'if-without-then', 'long-lines', 'digit-runs')
+
+
+def file_sizes(files: int, total_bytes: int, rng: random.Random) -> list:
+    """Lognormal file sizes scaled to add up to roughly total_bytes."""
+    weights = [rng.lognormvariate(0, 1) for _ in range(files)]
+    scale = total_bytes / sum(weights)
+    return [max(64, int(weight * scale)) for weight in weights]
+
+
+def generate_workspace(root: Path, files: int, total_bytes: int, seed: int = 42,
+                       adversarial_every: int = 0) -> dict:
+    """Write a synthetic workspace (or reuse a matching one) and return its manifest.
+
+    With `adversarial_every` N > 0, every Nth file is adversarial input,
+    cycling through ADVERSARIAL_KINDS. Raises FileExistsError for a
+    non-empty directory this tool didn't generate (no manifest).
+    """
+    manifest = {'files': files, 'total_bytes': total_bytes, 'seed': seed, 'adversarial_every': adversarial_every}
+    root.mkdir(parents=True, exist_ok=True)
+    manifest_path = root / MANIFEST
+    try:
+        if json.loads(manifest_path.read_text()) == manifest:
+            return manifest
+    except FileNotFoundError:
+        if any(root.iterdir()):
+            raise FileExistsError(f'{root} is not empty and has no {MANIFEST}; refusing to overwrite it')
+    except (OSError, ValueError):
+        pass
+
+    for stale in root.glob('NOTE_*.md'):
+        stale.unlink()
+    rng = random.Random(seed)
+    for i, size in enumerate(file_sizes(files, total_bytes, rng)):
+        if adversarial_every and i % adversarial_every == adversarial_every - 1:
+            kind = ADVERSARIAL_KINDS[(i // adversarial_every) % len(ADVERSARIAL_KINDS)]
+            content = adversarial_markdown(kind, size, seed + i)
+        else:
+            content = synthetic_markdown(size, seed + i)
+        (root / f'NOTE_{i:05d}.md').write_text(content, encoding='utf-8')
+
+    manifest_path.write_text(json.dumps(manifest))
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('directory', type=Path)
+    parser.add_argument('--scale', choices=SCALES, default='tiny')
+    parser.add_argument('--files', type=int, help='number of files (overrides --scale)')
+    parser.add_argument('--size', type=float, help='total size in MB (overrides --scale)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--adversarial-every', type=int, default=0, help='make every Nth file adversarial')
+    args = parser.parse_args()
+
+    files, total_bytes = SCALES[args.scale]
+    files = args.files or files
+    total_bytes = int(args.size * 1024 * 1024) if args.size else total_bytes
+    try:
+        manifest = generate_workspace(args.directory, files, total_bytes, args.seed, args.adversarial_every)
+    except FileExistsError as e:
+        parser.error(str(e))
+    print(f"Workspace at {args.directory}: {manifest['files']} files, {manifest['total_bytes'] / (1024 * 1024):.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,9 @@
 class BehaviorFlowDashboard {
     constructor() {
         this.behaviorRules = null;
+        this.flowVersion = 0;
+        this.activeTab = 'time';
+        this.rulesCursor = null;
         this.init();
     }
 
@@ -98,14 +101,29 @@ class BehaviorFlowDashboard {
 
     async loadBehaviorFlow() {
         try {
-            const response = await fetch('/api/flowchart');
+            // Ask for what changed since the loaded version; the server sends
+            // the whole payload (full: true) when it can't tell
+            const since = this.behaviorRules ? this.flowVersion : 0;
+            const response = await fetch(`/api/flowchart/delta?since=${since}`, { cache: 'no-store' });
             const data = await response.json();
+            this.flowVersion = data.version;
 
-            this.updateFlowStats(data.summary);
+            if (!data.full) {
+                this.applyFlowDelta(data);
+                return;
+            }
+
+            this.updateFlowStats(data.summary, data.summary_raw);
             this.renderMermaidChart(data.mermaid);
 
-            this.behaviorRules = data;
-            this.filterRules('time');
+            // Rule cards are paged from /api/rules; keep only the chart and counts
+            this.behaviorRules = {
+                mermaid: data.mermaid,
+                files_scanned: data.files_scanned,
+                summary: data.summary,
+                summary_raw: data.summary_raw,
+            };
+            this.filterRules(this.activeTab || 'time');
 
             console.log('✅ Behavior flow loaded successfully');
         } catch (error) {
@@ -115,12 +133,75 @@ class BehaviorFlowDashboard {
         }
     }
 
-    updateFlowStats(summary) {
-        document.getElementById('timeRulesCount').textContent = summary.time_rules || 0;
-        document.getElementById('modeSwitchesCount').textContent = summary.mode_switches || 0;
-        document.getElementById('criticalRulesCount').textContent = summary.critical_rules || 0;
-        document.getElementById('workflowsCount').textContent = summary.conditional_workflows || 0;
-        document.getElementById('permissionGatesCount').textContent = summary.permission_gates || 0;
+    applyFlowDelta(delta) {
+        const flow = this.behaviorRules;
+        const { added, changed, removed } = delta.rules;
+        if (!delta.files.added.length && !delta.files.changed.length && !delta.files.removed.length) {
+            console.log('✅ Behavior flow unchanged');
+            return;
+        }
+
+        Object.assign(flow, {
+            files_scanned: delta.files_scanned,
+            summary: delta.summary,
+            summary_raw: delta.summary_raw,
+        });
+        this.updateFlowStats(delta.summary, delta.summary_raw);
+        if (delta.mermaid !== undefined) {
+            flow.mermaid = delta.mermaid;
+            this.renderMermaidChart(delta.mermaid);
+        }
+
+        const removedIds = new Set(removed);
+        const changedById = new Map(changed.map(rule => [rule.id, rule]));
+        this.patchRuleCards(removedIds, changedById, added);
+
+        console.log(`✅ Behavior flow patched: ${added.length} added, ${changed.length} changed, ${removed.length} removed`);
+    }
+
+    patchRuleCards(removedIds, changedById, added) {
+        const rulesContent = document.getElementById('rulesContent');
+        const tab = BehaviorFlowDashboard.RULE_TABS[this.activeTab];
+        const grid = rulesContent?.querySelector('.rules-grid');
+        if (!grid) {
+            // The tab showed "no rules"; reload it if some arrived
+            if (tab && added.some(rule => rule.type === tab.rule)) this.filterRules(this.activeTab);
+            return;
+        }
+
+        grid.querySelectorAll('.rule-card').forEach(card => {
+            const id = card.dataset.ruleId;
+            if (removedIds.has(id)) {
+                card.remove();
+            } else if (changedById.has(id)) {
+                card.outerHTML = this.renderRuleCard(changedById.get(id));
+            }
+        });
+
+        // New rules show up in later pages; append them once every page is loaded
+        if (!this.rulesCursor) {
+            grid.insertAdjacentHTML('beforeend', added
+                .filter(rule => rule.type === tab.rule)
+                .map(rule => this.renderRuleCard(rule))
+                .join(''));
+        }
+        rulesContent.querySelector('.rules-total').textContent = `(${this.behaviorRules.summary[tab.type] || 0})`;
+    }
+
+    updateFlowStats(summary, raw = {}) {
+        const counters = {
+            time_rules: 'timeRulesCount',
+            mode_switches: 'modeSwitchesCount',
+            critical_rules: 'criticalRulesCount',
+            conditional_workflows: 'workflowsCount',
+            permission_gates: 'permissionGatesCount',
+        };
+        for (const [category, id] of Object.entries(counters)) {
+            const element = document.getElementById(id);
+            element.textContent = summary[category] || 0;
+            // Overlapping matches are merged server-side; show how many there were
+            element.title = category in raw ? `${raw[category]} matches before deduplication` : '';
+        }
     }
 
     async renderMermaidChart(mermaidCode) {
@@ -140,58 +221,70 @@ class BehaviorFlowDashboard {
         }
     }
 
-    filterRules(tabType) {
-        if (!this.behaviorRules) return;
+    // Rule types served by /api/rules, per tab
+    static RULE_TABS = {
+        time: { type: 'time_rules', rule: 'time_rule', title: 'Time Rules' },
+        mode: { type: 'mode_switches', rule: 'mode_switch', title: 'Mode Switches' },
+        workflow: { type: 'conditional_workflows', rule: 'conditional_workflow', title: 'Conditional Workflows' },
+        critical: { type: 'critical_rules', rule: 'critical_rule', title: 'Critical Rules' },
+        permission: { type: 'permission_gates', rule: 'permission_gate', title: 'Permission Gates' },
+    };
 
+    async filterRules(tabType) {
         const rulesContent = document.getElementById('rulesContent');
-        if (!rulesContent) return;
-
-        let rules = [];
-        let title = '';
-
-        switch (tabType) {
-            case 'time':
-                rules = this.behaviorRules.time_rules || [];
-                title = 'Time Rules';
-                break;
-            case 'mode':
-                rules = this.behaviorRules.mode_switches || [];
-                title = 'Mode Switches';
-                break;
-            case 'workflow':
-                rules = this.behaviorRules.conditional_workflows || [];
-                title = 'Conditional Workflows';
-                break;
-            case 'critical':
-                rules = this.behaviorRules.critical_rules || [];
-                title = 'Critical Rules';
-                break;
-            case 'permission':
-                rules = this.behaviorRules.permission_gates || [];
-                title = 'Permission Gates';
-                break;
-        }
-
-        if (rules.length === 0) {
-            rulesContent.innerHTML = `<p class="no-rules">No ${title.toLowerCase()} found.</p>`;
-            return;
-        }
+        const tab = BehaviorFlowDashboard.RULE_TABS[tabType];
+        if (!rulesContent || !tab) return;
 
+        this.activeTab = tabType;
         rulesContent.innerHTML = `
-            <h4 class="rules-section-title">${title}</h4>
-            <div class="rules-grid">
-                ${rules.map(rule => this.renderRuleCard(rule)).join('')}
-            </div>
+            <h4 class="rules-section-title">${tab.title} <span class="rules-total"></span></h4>
+            <div class="rules-grid"></div>
+            <button class="btn-small load-more hidden">Load more</button>
         `;
+        rulesContent.querySelector('.load-more').addEventListener('click', () => this.loadRulesPage(tabType));
+
+        this.rulesCursor = null;
+        await this.loadRulesPage(tabType);
+    }
+
+    async loadRulesPage(tabType) {
+        const rulesContent = document.getElementById('rulesContent');
+        const tab = BehaviorFlowDashboard.RULE_TABS[tabType];
+        const params = new URLSearchParams({ type: tab.type, limit: 50 });
+        if (this.rulesCursor) params.set('cursor', this.rulesCursor);
+
+        try {
+            const response = await fetch(`/api/rules?${params}`);
+            const data = await response.json();
+
+            // Ignore pages for a tab the user has already left
+            if (this.activeTab !== tabType) return;
+
+            if (data.total === 0) {
+                rulesContent.innerHTML = `<p class="no-rules">No ${tab.title.toLowerCase()} found.</p>`;
+                return;
+            }
+
+            rulesContent.querySelector('.rules-total').textContent = `(${data.total})`;
+            rulesContent.querySelector('.rules-grid').insertAdjacentHTML(
+                'beforeend', data.rules.map(rule => this.renderRuleCard(rule)).join('')
+            );
+
+            this.rulesCursor = data.next_cursor;
+            rulesContent.querySelector('.load-more').classList.toggle('hidden', !data.next_cursor);
+        } catch (error) {
+            console.error('Failed to load rules:', error);
+        }
     }
 
     renderRuleCard(rule) {
         const context = rule.context || rule.rule || rule.pattern || '';
         const file = rule.file || 'Unknown';
+        const location = rule.line ? `${file}:${rule.line}:${rule.column || 1}` : file;
 
         return `
-            <div class="rule-card">
-                <div class="rule-file">📄 ${file}</div>
+            <div class="rule-card" data-rule-id="${this.escapeHtml(rule.id || '').replace(/"/g, '&quot;')}">
+                <div class="rule-file">📄 ${this.escapeHtml(location)}</div>
                 <div class="rule-context">${this.escapeHtml(context)}</div>
             </div>
         `;
@@ -4,13 +4,31 @@ Lumi Admin Dashboard Server
 Serves the OpenClaw admin dashboard
 """
 
+import bisect
+import email.utils
 import json
 import os
+import sqlite3
 import subprocess
+import tempfile
+import threading
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 from pathlib import Path
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlencode, urlparse, parse_qs
+
+import agents
+import assets
+import metrics
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json encoder
+    orjson = None
 
 # Paths
 DASHBOARD_DIR = Path.home() / ".openclaw" / "workspace" / "lumi-dashboard"
@@ -20,54 +38,382 @@ OPENCLAW_CONFIG = Path.home() / ".openclaw" / "openclaw.json"
 BUILTIN_SKILLS_DIR = Path.home() / ".npm-global" / "lib" / "node_modules" / "openclaw" / "skills"
 WORKSPACE_SKILLS_DIR = WORKSPACE_DIR / "skills"
 
-# Agent data (single main agent for now)
-# TODO: Integrate with OpenClaw to get real agent list
-AGENTS = [
-    {"id": "main", "name": "Lumi", "online": True, "skills": 12},
-]
+# Status push channel
+STATUS_POLL_INTERVAL = 0.5   # seconds between status.json stat checks
+SSE_HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments on idle streams
 
-def get_status():
-    """Get current Lumi status from status.json"""
-    if not STATUS_FILE.exists():
-        return {
-            "status": "idle",
-            "message": "Ready for new tasks",
-            "last_updated": datetime.now().isoformat()
-        }
+# Status history: transitions kept in memory, optionally appended to a file
+STATUS_HISTORY_SIZE = int(os.environ.get("LUMI_STATUS_HISTORY_SIZE", "100000"))
+STATUS_HISTORY_FILE = os.environ.get("LUMI_STATUS_HISTORY_FILE", "")
+STATUS_HISTORY_RANGE = 24 * 3600  # default /api/status/history window, seconds
+STATUS_HISTORY_BUCKETS = 96       # default number of buckets when none is given
+STATUS_HISTORY_MAX_BUCKETS = 2000
 
-    try:
-        with open(STATUS_FILE, 'r') as f:
-            status_data = json.load(f)
-            return status_data
-    except:
+# Concurrency limits (override with environment variables)
+MAX_WORKERS = int(os.environ.get("LUMI_MAX_WORKERS", "16"))        # threads for ordinary requests
+MAX_STREAMS = int(os.environ.get("LUMI_MAX_STREAMS", "16"))        # concurrent /api/status/stream clients
+MAX_QUEUED = int(os.environ.get("LUMI_MAX_QUEUED", "64"))          # accepted connections waiting for a worker
+REQUEST_TIMEOUT = float(os.environ.get("LUMI_REQUEST_TIMEOUT", "30"))   # to read a request's headers and body
+KEEPALIVE_TIMEOUT = float(os.environ.get("LUMI_KEEPALIVE_TIMEOUT", "5"))  # to receive the next request line
+MAX_BODY_BYTES = int(os.environ.get("LUMI_MAX_BODY_BYTES", str(16 * 1024 * 1024)))  # largest POST body accepted
+
+# Static assets come from assets.StaticAssetCache; files too large to keep go out via sendfile
+STATIC_CACHE_CONTROL = f"public, max-age={assets.STATIC_MAX_AGE}" if assets.STATIC_MAX_AGE > 0 else "no-cache"
+
+# Skill catalog: directory rescans happen at most this often (seconds)
+SKILL_RESCAN_INTERVAL = float(os.environ.get("LUMI_SKILL_RESCAN_INTERVAL", "1.0"))
+SKILL_FRONTMATTER_BYTES = 16 * 1024  # how much of SKILL.md to read for its frontmatter
+
+# /api/bootstrap and /api/batch: sections are gathered concurrently on a small pool
+BATCH_MAX_PATHS = 16
+BATCH_WORKERS = 8
+
+# Rule store maintained by api.py (LUMI_RULE_DB); read-only here
+RULE_DB = os.environ.get("LUMI_RULE_DB", "")
+RULE_CATEGORIES = ("time_rules", "mode_switches", "conditional_workflows", "critical_rules", "permission_gates")
+
+# Served at /api/metrics in the Prometheus text format
+METRICS = metrics.Registry()
+HTTP_REQUESTS = METRICS.counter("lumi_http_requests_total", "HTTP requests by route, method and status.",
+                                ("route", "method", "status"))
+HTTP_LATENCY = METRICS.histogram("lumi_http_request_duration_seconds", "Time to serve a request, by route.",
+                                 ("route",))
+HTTP_BYTES = METRICS.counter("lumi_http_response_bytes_total", "Response body bytes, after compression, by route.",
+                             ("route",))
+SKILL_SCAN_DURATION = METRICS.histogram("lumi_skill_scan_seconds", "Skill catalog rescans.",
+                                        buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+# Paths reported as their own route; anything else is "static" or "other"
+METRIC_ROUTES = frozenset((
+    "/api/status", "/api/status/history", "/api/status/stream", "/api/dashboard", "/api/skills",
+    "/api/channels", "/api/cron", "/api/settings", "/api/rules", "/api/file", "/api/bootstrap",
+    "/api/batch", "/api/restart", "/api/metrics",
+))
+
+# Agents and their workspaces, discovered from openclaw.json (agents.list)
+AGENT_REGISTRY = agents.AgentRegistry(OPENCLAW_CONFIG)
+# Files the editor may read and write in an agent's workspace
+AGENT_FILES = frozenset(("SOUL.md", "MEMORY.md", "USER.md", "IDENTITY.md", "TOOLS.md"))
+
+def default_status():
+    """Status reported when status.json is missing or unreadable"""
+    return {
+        "status": "idle",
+        "message": "Ready for new tasks",
+        "last_updated": datetime.now().isoformat()
+    }
+
+class StatusHistory:
+    """Bounded ring buffer of status transitions, stored column-wise
+
+    Each transition costs 10 bytes: a float64 timestamp plus a uint16 code
+    into a table of status names. Once `capacity` transitions are held the
+    oldest are overwritten. With a `path`, transitions are also appended to
+    a tab-separated log, and the newest `capacity` entries are loaded from it
+    at startup.
+    """
+
+    def __init__(self, capacity=STATUS_HISTORY_SIZE, path=None):
+        self.capacity = capacity
+        self.times = array("d", [0.0]) * capacity
+        self.codes = array("H", [0]) * capacity
+        self.names = []
+        self._name_codes = {}
+        self._start = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._log = None
+        if path:
+            self._load(path)
+            self._log = open(path, "a", buffering=1, encoding="utf-8")
+
+    def _load(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    timestamp, _, status = line.rstrip("\n").partition("\t")
+                    try:
+                        self._append(float(timestamp), status)
+                    except ValueError:
+                        continue  # torn or foreign line
+        except FileNotFoundError:
+            pass
+
+    def _code(self, status):
+        code = self._name_codes.get(status)
+        if code is None:
+            code = self._name_codes[status] = len(self.names)
+            self.names.append(status)
+        return code
+
+    def _append(self, timestamp, status):
+        """Store a transition unless it repeats the latest status. Caller holds the lock."""
+        code = self._code(status)
+        if self._count:
+            last = (self._start + self._count - 1) % self.capacity
+            if self.codes[last] == code:
+                return False
+        index = (self._start + self._count) % self.capacity
+        self.times[index] = timestamp
+        self.codes[index] = code
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+        return True
+
+    def record(self, timestamp, status):
+        """Record an observed status; repeats of the current status are ignored"""
+        status = str(status)
+        with self._lock:
+            if self._append(timestamp, status) and self._log is not None:
+                try:
+                    self._log.write(f"{timestamp:.3f}\t{status}\n")
+                except OSError as e:
+                    print(f"Error writing status history: {e}")
+
+    def transitions(self):
+        """(times, codes) in chronological order"""
+        with self._lock:
+            end = self._start + self._count
+            if end <= self.capacity:
+                return self.times[self._start:end], self.codes[self._start:end]
+            end %= self.capacity
+            return (self.times[self._start:] + self.times[:end],
+                    self.codes[self._start:] + self.codes[:end])
+
+    def aggregate(self, start, end, bucket):
+        """Seconds spent in each status per `bucket`-second interval of [start, end)
+
+        The status in effect at `start` is the last transition before it;
+        time before the first recorded transition is not attributed.
+        """
+        times, codes = self.transitions()
+        names = list(self.names)
+        buckets = [{"start": start + i * bucket, "seconds": {}, "transitions": 0}
+                   for i in range(max(1, int(-(-(end - start) // bucket))))]
+        totals = {}
+        last = len(buckets) - 1
+
+        first = max(bisect.bisect_right(times, start) - 1, 0)
+        for i in range(first, len(times)):
+            if times[i] >= end:
+                break
+            begin = max(times[i], start)
+            finish = min(times[i + 1] if i + 1 < len(times) else end, end)
+            if times[i] >= start:
+                buckets[min(int((times[i] - start) // bucket), last)]["transitions"] += 1
+            name = names[codes[i]]
+            # Spread the interval over the buckets it covers. Walk bucket
+            # indices rather than edges: a float edge can round back onto begin
+            first_index = min(int((begin - start) // bucket), last)
+            for index in range(first_index, min(int((finish - start) // bucket), last) + 1):
+                edge = start + index * bucket
+                overlap = min(edge + bucket, finish) - max(edge, begin)
+                if overlap > 0:
+                    seconds = buckets[index]["seconds"]
+                    seconds[name] = seconds.get(name, 0.0) + overlap
+                    totals[name] = totals.get(name, 0.0) + overlap
+
+        for entry in buckets:
+            entry["seconds"] = {name: round(value, 3) for name, value in entry["seconds"].items()}
+            entry["dominant"] = max(entry["seconds"], key=entry["seconds"].get) if entry["seconds"] else None
         return {
-            "status": "idle",
-            "message": "Ready for new tasks",
-            "last_updated": datetime.now().isoformat()
+            "from": start,
+            "to": end,
+            "bucket": bucket,
+            "totals": {name: round(value, 3) for name, value in totals.items()},
+            "buckets": buckets,
         }
 
-def get_agent_file(agent_id, filename):
-    """Get file content from workspace"""
-    # Map agent IDs to workspace files
-    agent_files = {
-        "main": {
-            "SOUL.md": "SOUL.md",
-            "MEMORY.md": "MEMORY.md",
-            "USER.md": "USER.md",
-            "IDENTITY.md": "IDENTITY.md",
-            "TOOLS.md": "TOOLS.md",
-        }
-    }
+STATUS_HISTORY = StatusHistory(path=STATUS_HISTORY_FILE or None)
 
-    if agent_id not in agent_files:
-        return None
+class StatusMonitor:
+    """Watch status.json and keep its parsed contents in memory
+
+    The file is only re-read when its mtime/size change. A background thread
+    checks it every STATUS_POLL_INTERVAL and wakes stream subscribers on change.
+    """
+
+    def __init__(self, path, interval=STATUS_POLL_INTERVAL, history=None):
+        self.path = path
+        self.interval = interval
+        self.history = history
+        self.version = 0
+        self._key = None
+        self._status = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._thread = None
+
+    def _stat_key(self):
+        try:
+            stat = self.path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def _reload(self, key):
+        """Re-read the file if it changed. Caller holds the lock."""
+        if key == self._key and self._status is not None:
+            return False
+        self._key = key
+        self._status = None
+        if key is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._status = json.load(f)
+            except:
+                pass
+        if self.history is not None:
+            current = self._status if self._status is not None else default_status()
+            self.history.record(time.time(), current.get("status", "unknown"))
+        self.version += 1
+        self._changed.notify_all()
+        return True
+
+    def snapshot(self):
+        """(version, status), re-parsing status.json only if it changed"""
+        key = self._stat_key()
+        with self._lock:
+            self._reload(key)
+            status = self._status if self._status is not None else default_status()
+            return self.version, status
+
+    def current(self):
+        """Current status"""
+        return self.snapshot()[1]
+
+    def wait_for_change(self, version, timeout):
+        """Block until the version moves past `version` or the timeout expires"""
+        with self._lock:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            status = self._status if self._status is not None else default_status()
+            return self.version, status
+
+    def start(self):
+        """Start the background change detector (idempotent)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="status-monitor", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            key = self._stat_key()
+            with self._lock:
+                self._reload(key)
+            time.sleep(self.interval)
+
+STATUS_MONITOR = StatusMonitor(STATUS_FILE, history=STATUS_HISTORY)
+
+class JsonFileCache:
+    """Parsed contents of a JSON file, re-parsed only when its mtime/size change
+
+    Readers share the cached object and must not mutate it. `save` writes a
+    temp file in the same directory and renames it over the original, so a
+    concurrent reader sees either the old or the new file, never a partial
+    one, and then caches what it wrote.
+    """
 
-    if filename not in agent_files[agent_id]:
+    def __init__(self, path):
+        self.path = path
+        self._key = None
+        self._data = None
+        self._error = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _stat_key(self):
+        try:
+            stat = self.path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def load(self):
+        """Parsed file ({} if it doesn't exist); raises OSError/ValueError if unreadable"""
+        key = self._stat_key()
+        with self._lock:
+            if key != self._key or (self._data is None and self._error is None):
+                self.misses += 1
+                self._key = key
+                self._data, self._error = {}, None
+                if key is not None:
+                    try:
+                        with open(self.path, 'r') as f:
+                            self._data = json.load(f)
+                    except (OSError, ValueError) as e:
+                        self._data, self._error = None, e
+            else:
+                self.hits += 1
+            if self._error is not None:
+                raise self._error
+            return self._data
+
+    def save(self, data):
+        """Atomically replace the file with `data` and cache it"""
+        with self._write_lock:
+            try:
+                mode = self.path.stat().st_mode & 0o777
+            except OSError:
+                mode = 0o600
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp_path, mode)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+            key = self._stat_key()
+            with self._lock:
+                self._key, self._data, self._error = key, data, None
+
+OPENCLAW_CONFIG_CACHE = JsonFileCache(OPENCLAW_CONFIG)
+
+def get_status():
+    """Get current Lumi status from status.json"""
+    return STATUS_MONITOR.current()
+
+def parse_time(value):
+    """Epoch seconds from a number or an ISO 8601 timestamp"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+def get_status_history(query):
+    """Downsampled status history for /api/status/history (raises ValueError on bad input)"""
+    STATUS_MONITOR.snapshot()  # record a pending change before reading
+    end = parse_time(query["to"][0]) if "to" in query else time.time()
+    start = parse_time(query["from"][0]) if "from" in query else end - STATUS_HISTORY_RANGE
+    if end <= start:
+        raise ValueError("'to' must be after 'from'")
+    bucket = float(query["bucket"][0]) if "bucket" in query else (end - start) / STATUS_HISTORY_BUCKETS
+    if not bucket > 0 or (end - start) / bucket > STATUS_HISTORY_MAX_BUCKETS:
+        raise ValueError(f"bucket must be positive and give at most {STATUS_HISTORY_MAX_BUCKETS} buckets")
+    return STATUS_HISTORY.aggregate(start, end, bucket)
+
+def agent_file_path(agent_id, filename):
+    """Path of an editable file in an agent's workspace (None for an unknown agent or file)"""
+    agent = AGENT_REGISTRY.get(agent_id)
+    if agent is None or filename not in AGENT_FILES:
         return None
+    return agent.workspace / filename
 
-    file_path = WORKSPACE_DIR / agent_files[agent_id][filename]
+def get_agent_file(agent_id, filename):
+    """Get file content from the agent's workspace"""
+    file_path = agent_file_path(agent_id, filename)
 
-    if not file_path.exists():
+    if file_path is None or not file_path.exists():
         return None
 
     try:
@@ -77,25 +423,12 @@ def get_agent_file(agent_id, filename):
         return None
 
 def save_agent_file(agent_id, filename, content):
-    """Save file content to workspace"""
-    agent_files = {
-        "main": {
-            "SOUL.md": "SOUL.md",
-            "MEMORY.md": "MEMORY.md",
-            "USER.md": "USER.md",
-            "IDENTITY.md": "IDENTITY.md",
-            "TOOLS.md": "TOOLS.md",
-        }
-    }
-
-    if agent_id not in agent_files:
-        return False
+    """Save file content to the agent's workspace"""
+    file_path = agent_file_path(agent_id, filename)
 
-    if filename not in agent_files[agent_id]:
+    if file_path is None:
         return False
 
-    file_path = WORKSPACE_DIR / agent_files[agent_id][filename]
-
     try:
         with open(file_path, 'w') as f:
             f.write(content)
@@ -108,62 +441,177 @@ def restart_agent(agent_id):
     # In real deployment, this would send SIGUSR1 or call OpenClaw API
     return True
 
-def get_skills():
-    """List installed skills from OpenClaw"""
-    skills = []
-
-    # Scan builtin skills
-    if BUILTIN_SKILLS_DIR.exists():
-        for skill_dir in BUILTIN_SKILLS_DIR.iterdir():
-            if skill_dir.is_dir():
-                skill_file = skill_dir / "SKILL.md"
-                if skill_file.exists():
-                    skills.append({
-                        "name": skill_dir.name,
-                        "location": "builtin",
-                        "path": str(skill_dir)
-                    })
+def parse_frontmatter(text):
+    """Top-level `key: value` pairs of a `---` delimited frontmatter block"""
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != "---":
+        return {}
+    fields = {}
+    for line in lines[1:]:
+        if line.strip() == "---":
+            return fields
+        if not line or line[0].isspace() or ":" not in line:
+            continue  # nested or continuation lines
+        key, _, value = line.partition(":")
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        fields[key.strip()] = value
+    return {}  # unterminated block
+
+class SkillCatalog:
+    """Index of installed skills, rescanned incrementally
 
-    # Scan workspace skills
-    if WORKSPACE_SKILLS_DIR.exists():
-        for skill_dir in WORKSPACE_SKILLS_DIR.iterdir():
-            if skill_dir.is_dir():
-                skill_file = skill_dir / "SKILL.md"
-                if skill_file.exists():
+    A skills root is re-listed only when its own mtime changes (a skill was
+    added, removed or renamed); a skill directory is re-checked for SKILL.md
+    only when its mtime changes. SKILL.md frontmatter is parsed on first use
+    and cached until the file's mtime/size change. All of these stat checks
+    run at most once per SKILL_RESCAN_INTERVAL.
+    """
+
+    def __init__(self, roots, interval=SKILL_RESCAN_INTERVAL):
+        self.roots = roots  # [(directory, location)]
+        self.interval = interval
+        self._listings = {}  # root -> (mtime_ns, {name: skill dir entry})
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _rescan(self):
+        """Bring every root's listing up to date. Caller holds the lock."""
+        for root, location in self.roots:
+            try:
+                root_mtime = root.stat().st_mtime_ns
+            except OSError:
+                self._listings.pop(root, None)
+                continue
+
+            cached_mtime, dirs = self._listings.get(root, (None, {}))
+            if root_mtime != cached_mtime:
+                names = []
+                try:
+                    with os.scandir(root) as it:
+                        names = [entry.name for entry in it if entry.is_dir()]
+                except OSError:
+                    pass
+                dirs = {name: dirs.get(name) for name in sorted(names)}
+
+            for name, entry in dirs.items():
+                path = root / name
+                try:
+                    dir_mtime = path.stat().st_mtime_ns
+                except OSError:
+                    dir_mtime = None
+                if entry is None or entry["mtime_ns"] != dir_mtime:
+                    dirs[name] = {
+                        "mtime_ns": dir_mtime,
+                        "name": name,
+                        "location": location,
+                        "path": str(path),
+                        "installed": dir_mtime is not None and (path / "SKILL.md").is_file(),
+                        "meta_key": None,
+                        "meta_checked": None,
+                        "meta": {},
+                    }
+            self._listings[root] = (root_mtime, dirs)
+
+    def _metadata(self, entry, now):
+        """Cached SKILL.md frontmatter, re-read when the file changes. Caller holds the lock."""
+        if entry["meta_checked"] is not None and now - entry["meta_checked"] < self.interval:
+            return entry["meta"]
+        entry["meta_checked"] = now
+        skill_file = Path(entry["path"]) / "SKILL.md"
+        try:
+            stat = skill_file.stat()
+        except OSError:
+            entry["meta_key"], entry["meta"] = None, {}
+            return entry["meta"]
+        key = (stat.st_mtime_ns, stat.st_size)
+        if entry["meta_key"] != key:
+            try:
+                with open(skill_file, "r", encoding="utf-8", errors="replace") as f:
+                    entry["meta"] = parse_frontmatter(f.read(SKILL_FRONTMATTER_BYTES))
+            except OSError:
+                entry["meta"] = {}
+            entry["meta_key"] = key
+        return entry["meta"]
+
+    def list(self, query=None):
+        """Installed skills with description/version, optionally filtered by a search term"""
+        needle = query.lower() if query else None
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at >= self.interval:
+                self._rescan()
+                self._checked_at = now
+                SKILL_SCAN_DURATION.observe(time.monotonic() - now)
+
+            skills = []
+            for _, dirs in self._listings.values():
+                for entry in dirs.values():
+                    if not entry["installed"]:
+                        continue
+                    meta = self._metadata(entry, now)
+                    description = meta.get("description", "")
+                    if needle and needle not in entry["name"].lower() and needle not in description.lower():
+                        continue
                     skills.append({
-                        "name": skill_dir.name,
-                        "location": "workspace",
-                        "path": str(skill_dir)
+                        "name": entry["name"],
+                        "location": entry["location"],
+                        "path": entry["path"],
+                        "description": description,
+                        "version": meta.get("version"),
                     })
+            return skills
+
+SKILL_CATALOG = SkillCatalog([(BUILTIN_SKILLS_DIR, "builtin"), (WORKSPACE_SKILLS_DIR, "workspace")])
+
+AGENT_SKILL_CATALOGS = {}
+
+def agent_skill_catalog(workspace):
+    """Builtin skills plus those in an agent workspace's skills directory"""
+    if workspace == WORKSPACE_DIR:
+        return SKILL_CATALOG
+    catalog = AGENT_SKILL_CATALOGS.get(workspace)
+    if catalog is None:
+        catalog = AGENT_SKILL_CATALOGS.setdefault(
+            workspace, SkillCatalog([(BUILTIN_SKILLS_DIR, "builtin"), (workspace / "skills", "workspace")]))
+    return catalog
+
+def get_agents():
+    """Configured agents for the sidebar, default agent first"""
+    return [
+        {**agent.to_dict(), "online": True, "skills": len(agent_skill_catalog(agent.workspace).list())}
+        for agent in AGENT_REGISTRY.agents()
+    ]
 
-    return skills
+def get_skills(query=None):
+    """List installed skills from OpenClaw"""
+    return SKILL_CATALOG.list(query)
 
 def get_channels():
     """List configured messaging channels from OpenClaw config"""
     channels = []
 
-    if OPENCLAW_CONFIG.exists():
-        try:
-            with open(OPENCLAW_CONFIG, 'r') as f:
-                config = json.load(f)
-
-                # Extract channel configurations
-                if 'discord' in config:
-                    channels.append({
-                        "type": "Discord",
-                        "id": config.get('discord', {}).get('channelId', 'unknown'),
-                        "status": "connected" if config.get('discord', {}).get('channelId') else "disconnected"
-                    })
+    try:
+        config = OPENCLAW_CONFIG_CACHE.load()
+    except (OSError, ValueError) as e:
+        print(f"Error reading OpenClaw config: {e}")
+        return channels
 
-                if 'telegram' in config:
-                    channels.append({
-                        "type": "Telegram",
-                        "id": config.get('telegram', {}).get('chatId', 'unknown'),
-                        "status": "connected" if config.get('telegram', {}).get('chatId') else "disconnected"
-                    })
+    # Extract channel configurations
+    if 'discord' in config:
+        channels.append({
+            "type": "Discord",
+            "id": config.get('discord', {}).get('channelId', 'unknown'),
+            "status": "connected" if config.get('discord', {}).get('channelId') else "disconnected"
+        })
 
-        except Exception as e:
-            print(f"Error reading OpenClaw config: {e}")
+    if 'telegram' in config:
+        channels.append({
+            "type": "Telegram",
+            "id": config.get('telegram', {}).get('chatId', 'unknown'),
+            "status": "connected" if config.get('telegram', {}).get('chatId') else "disconnected"
+        })
 
     return channels
 
@@ -175,82 +623,454 @@ def get_cron_jobs():
         {"id": "job-2", "name": "Social Engagement", "schedule": "*/30 * * * *", "enabled": True},
     ]
 
-def get_settings():
-    """Get OpenClaw settings"""
-    if OPENCLAW_CONFIG.exists():
+def get_rules(agent):
+    """Read an agent's extracted rules from api.py's rule store (None if there is none)"""
+    if not RULE_DB or not os.path.exists(RULE_DB):
+        return None
+    prefix = os.path.join(str(agent.workspace), "")
+    try:
+        conn = sqlite3.connect(Path(RULE_DB).resolve().as_uri() + "?mode=ro", uri=True)
         try:
-            with open(OPENCLAW_CONFIG, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+            rows = conn.execute("SELECT label, results FROM files WHERE substr(path, 1, ?) = ? ORDER BY label",
+                                (len(prefix), prefix)).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+    rules = {category: [] for category in RULE_CATEGORIES}
+    raw_counts = dict.fromkeys(RULE_CATEGORIES, 0)
+    for label, results in rows:
+        stored = json.loads(results)
+        for category in RULE_CATEGORIES:
+            rules[category].extend(stored[category])
+            raw_counts[category] += stored.get("raw_counts", {}).get(category, len(stored[category]))
+
+    return {
+        "agent": agent.id,
+        "files": [label for label, _ in rows],
+        "rules": rules,
+        "summary": {category: len(found) for category, found in rules.items()},
+        "summary_raw": raw_counts,
+    }
+
+def get_settings():
+    """Get OpenClaw settings (shared cached object: don't mutate)"""
+    try:
+        return OPENCLAW_CONFIG_CACHE.load()
+    except (OSError, ValueError):
+        return {}
 
 def save_settings(settings):
     """Save OpenClaw settings"""
     try:
-        with open(OPENCLAW_CONFIG, 'w') as f:
-            json.dump(settings, f, indent=2)
+        OPENCLAW_CONFIG_CACHE.save(settings)
         return True
-    except:
+    except (OSError, TypeError, ValueError):
         return False
 
+def encode_json(data, pretty=False):
+    """Serialize a JSON response body: compact, or indented when pretty"""
+    if pretty:
+        return json.dumps(data, indent=2).encode()
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits
+    return json.dumps(data, separators=(",", ":")).encode()
+
+STATIC_ASSETS = assets.StaticAssetCache()
+
+def cache_counters():
+    """(hits, misses) of each cache, read at scrape time"""
+    return {
+        "config": (OPENCLAW_CONFIG_CACHE.hits, OPENCLAW_CONFIG_CACHE.misses),
+        "static": (STATIC_ASSETS.hits, STATIC_ASSETS.misses),
+    }
+
+METRICS.gauge("lumi_cache_hits_total", "Cache lookups answered from the cache.", ("cache",),
+              lambda: {(name,): hits for name, (hits, _) in cache_counters().items()}, kind="counter")
+METRICS.gauge("lumi_cache_misses_total", "Cache lookups that had to load the value.", ("cache",),
+              lambda: {(name,): misses for name, (_, misses) in cache_counters().items()}, kind="counter")
+METRICS.gauge("lumi_cache_hit_ratio", "Hits over lookups since start.", ("cache",),
+              lambda: {(name,): metrics.hit_ratio(*counts) for name, counts in cache_counters().items()})
+
+def metric_route(path, method):
+    """Route label for a request path, keeping label values bounded"""
+    route = urlparse(path).path
+    if route in METRIC_ROUTES:
+        return route
+    return "static" if method in ("GET", "HEAD") and not route.startswith("/api/") else "other"
+
+class DeadlineReader:
+    """Wraps a handler's rfile so reads fail once a deadline has passed
+
+    Each call reads at most one chunk from the socket at a time, with the
+    socket timeout cut to the time left, so a client trickling bytes can't
+    stretch a request past its deadline
+    """
+
+    def __init__(self, raw, connection, timeout):
+        self.raw = raw
+        self.connection = connection
+        self.timeout = timeout  # restored after each read, for the response
+        self.deadline = None
+
+    def _arm(self):
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("request deadline exceeded")
+        self.connection.settimeout(remaining)
+
+    def read(self, size=-1):
+        chunks = []
+        received = 0
+        try:
+            while size is None or size < 0 or received < size:
+                self._arm()
+                chunk = self.raw.read1(65536 if size is None or size < 0 else size - received)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                received += len(chunk)
+        finally:
+            self.connection.settimeout(self.timeout)
+        return b"".join(chunks)
+
+    def readline(self, limit=-1):
+        line = bytearray()
+        try:
+            while limit is None or limit < 0 or len(line) < limit:
+                self._arm()
+                buffered = self.raw.peek(1)
+                if not buffered:
+                    break
+                take = len(buffered) if limit is None or limit < 0 else min(len(buffered), limit - len(line))
+                newline = buffered.find(b"\n", 0, take)
+                line += self.raw.read(newline + 1 if newline >= 0 else take)
+                if newline >= 0:
+                    break
+        finally:
+            self.connection.settimeout(self.timeout)
+        return bytes(line)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+class CountingWriter:
+    """Wraps a handler's wfile and counts the bytes written through it"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+
+    def write(self, data):
+        self.count += len(data)
+        return self.raw.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+def api_get(path):
+    """(status, data) for a JSON GET endpoint, or None if the path isn't one"""
+    parsed = urlparse(path)
+    route = parsed.path
+    query = parse_qs(parsed.query)
+
+    if route == "/api/status":
+        return 200, {
+            "timestamp": datetime.now().isoformat(),
+            **get_status()
+        }
+    elif route == "/api/status/history":
+        try:
+            return 200, get_status_history(query)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+    elif route == "/api/dashboard":
+        return 200, {
+            "agents": get_agents(),
+            "port": 3001
+        }
+    elif route == "/api/skills":
+        return 200, {
+            "skills": get_skills(query.get("q", [""])[0].strip() or None)
+        }
+    elif route == "/api/channels":
+        return 200, {
+            "channels": get_channels()
+        }
+    elif route == "/api/cron":
+        return 200, {
+            "jobs": get_cron_jobs()
+        }
+    elif route == "/api/settings":
+        return 200, get_settings()
+    elif route == "/api/rules":
+        agent = AGENT_REGISTRY.get(query.get("agent", [None])[0])
+        if agent is None:
+            return 404, {"error": "Unknown agent"}
+        rules = get_rules(agent)
+        if rules is None:
+            return 404, {"error": "Rule store not available"}
+        return 200, rules
+    elif route == "/api/file":
+        agent_id = query.get("agent", [None])[0]
+        filename = query.get("file", ["Soul.md"])[0]
+
+        content = get_agent_file(agent_id, filename)
+
+        if content is None:
+            return 404, {"error": "File not found"}
+        return 200, {"content": content}
+    return None
+
+SECTION_POOL = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="lumi-section")
+BATCH_EXCLUDED = ("/api/status/stream", "/api/bootstrap", "/api/batch")
+
+def timed_api_get(path):
+    """(status, data, milliseconds) for one batched GET path"""
+    started = time.perf_counter()
+    if urlparse(path).path in BATCH_EXCLUDED:
+        result = (400, {"error": "Path can't be batched"})
+    else:
+        try:
+            result = api_get(path) or (404, {"error": "Not found"})
+        except Exception as e:
+            result = (500, {"error": str(e)})
+    return result + (round((time.perf_counter() - started) * 1000, 2),)
+
+def gather(paths):
+    """Run GET paths concurrently; returns {key: (status, data, ms)} for a {key: path} dict
+
+    Sections that read openclaw.json share one parse through OPENCLAW_CONFIG_CACHE.
+    """
+    futures = {key: SECTION_POOL.submit(timed_api_get, path) for key, path in paths.items()}
+    return {key: future.result() for key, future in futures.items()}
+
+def get_bootstrap(agent_id, filename):
+    """Everything the admin panel loads on start, in one response"""
+    started = time.perf_counter()
+    results = gather({
+        "dashboard": "/api/dashboard",
+        "skills": "/api/skills",
+        "channels": "/api/channels",
+        "cron": "/api/cron",
+        "settings": "/api/settings",
+        "file": "/api/file?" + urlencode({"file": filename, **({"agent": agent_id} if agent_id else {})}),
+    })
+    return {
+        "sections": {name: data for name, (_, data, _) in results.items()},
+        "status": {name: status for name, (status, _, _) in results.items()},
+        "timings_ms": {name: ms for name, (_, _, ms) in results.items()},
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+def get_batch(paths):
+    """Responses for arbitrary API GET paths, in request order"""
+    started = time.perf_counter()
+    results = gather(dict(enumerate(paths)))
+    return {
+        "responses": [
+            {"path": path, "status": status, "body": data, "ms": ms}
+            for path, (status, data, ms) in zip(paths, results.values())
+        ],
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
 class LumiDashboardHandler(SimpleHTTPRequestHandler):
     """Custom HTTP handler with API endpoints"""
 
+    protocol_version = "HTTP/1.1"
+    timeout = REQUEST_TIMEOUT
+    # Headers and body go out in separate writes; with Nagle on, a small body
+    # waits for the client's delayed ACK (~40ms) on keep-alive connections
+    disable_nagle_algorithm = True
+    stream_slots = threading.BoundedSemaphore(MAX_STREAMS)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(DASHBOARD_DIR), **kwargs)
 
+    def setup(self):
+        super().setup()
+        self.rfile = DeadlineReader(self.rfile, self.connection, self.timeout)
+        self.wfile = CountingWriter(self.wfile)
+
+    def handle(self):
+        """Serve keep-alive requests, closing connections idle for KEEPALIVE_TIMEOUT"""
+        self.close_connection = False
+        while not self.close_connection:
+            # Waiting for a request line: idle and slow clients are dropped quickly
+            self.rfile.deadline = time.monotonic() + KEEPALIVE_TIMEOUT
+            self.handle_one_request()
+
+    def handle_one_request(self):
+        """Serve one request and record its metrics"""
+        self.command = None
+        self.request_started = None
+        self.response_status = None
+        super().handle_one_request()
+        if self.command is not None and self.request_started is not None:
+            route = metric_route(self.path, self.command)
+            HTTP_REQUESTS.inc(route, self.command, str(int(self.response_status or 0)))
+            HTTP_LATENCY.observe(time.perf_counter() - self.request_started, route)
+            HTTP_BYTES.inc(route, amount=self.wfile.count)
+
+    def parse_request(self):
+        # Request line received: headers and body must arrive within REQUEST_TIMEOUT
+        self.rfile.deadline = time.monotonic() + REQUEST_TIMEOUT
+        self.request_started = time.perf_counter()
+        self.wfile.count = 0
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        self.response_status = code
+        super().send_response(code, message)
+
+    def flush_headers(self):
+        # Only body bytes count towards lumi_http_response_bytes_total
+        count = self.wfile.count
+        super().flush_headers()
+        self.wfile.count = count
+
     def do_GET(self):
         """Handle GET requests"""
-        if self.path == "/api/status":
-            self.send_json_response({
-                "timestamp": datetime.now().isoformat(),
-                **get_status()
-            })
-        elif self.path == "/api/dashboard":
-            self.send_json_response({
-                "agents": AGENTS,
-                "port": 3001
-            })
-        elif self.path == "/api/skills":
-            self.send_json_response({
-                "skills": get_skills()
-            })
-        elif self.path == "/api/channels":
-            self.send_json_response({
-                "channels": get_channels()
-            })
-        elif self.path == "/api/cron":
-            self.send_json_response({
-                "jobs": get_cron_jobs()
-            })
-        elif self.path == "/api/settings":
-            self.send_json_response(get_settings())
-        elif self.path.startswith("/api/file"):
-            # Parse query parameters
-            parsed = urlparse(self.path)
-            query = parse_qs(parsed.query)
-
-            agent_id = query.get("agent", ["main"])[0]
-            filename = query.get("file", ["Soul.md"])[0]
-
-            content = get_agent_file(agent_id, filename)
-
-            if content is None:
-                self.send_json_response({"error": "File not found"}, status=404)
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        if parsed.path == "/api/status/stream":
+            self.stream_status()
+        elif parsed.path == "/api/metrics":
+            self.send_body(METRICS.render().encode(), metrics.CONTENT_TYPE)
+        elif parsed.path == "/api/bootstrap":
+            agent_id = query.get("agent", [None])[0]
+            filename = query.get("file", ["SOUL.md"])[0]
+            self.send_json_response(get_bootstrap(agent_id, filename))
+        elif parsed.path == "/api/batch":
+            paths = query.get("path", [])
+            if not paths or len(paths) > BATCH_MAX_PATHS:
+                self.send_json_response({"error": f"Give 1-{BATCH_MAX_PATHS} path parameters"}, status=400)
             else:
-                self.send_json_response({"content": content})
+                self.send_json_response(get_batch(paths))
         else:
-            super().do_GET()
+            result = api_get(self.path)
+            if result is None:
+                self.send_static()
+            else:
+                status, data = result
+                self.send_json_response(data, status=status)
+
+    def do_HEAD(self):
+        """Handle HEAD requests for static assets"""
+        self.send_static(head=True)
+
+    def send_static(self, head=False):
+        """Serve a dashboard file from STATIC_ASSETS, honouring conditional GET
+
+        Directories and missing files are left to SimpleHTTPRequestHandler.
+        """
+        entry = STATIC_ASSETS.get(self.translate_path(self.path))
+        if entry is None:
+            return super().do_HEAD() if head else super().do_GET()
+
+        coding = None
+        if entry["encoded"]:
+            coding = assets.negotiate_encoding(self.headers.get("Accept-Encoding", ""), entry["encoded"])
+        etag = f'"{entry["etag"]}-{coding}"' if coding else f'"{entry["etag"]}"'
+
+        not_modified = self.is_not_modified(entry, etag)
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", email.utils.formatdate(entry["mtime"], usegmt=True))
+        self.send_header("Cache-Control", STATIC_CACHE_CONTROL)
+        if entry["encoded"]:
+            self.send_header("Vary", "Accept-Encoding")
+        if not_modified:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = entry["encoded"][coding] if coding else entry["body"]
+        self.send_header("Content-Type", entry["content_type"])
+        if coding:
+            self.send_header("Content-Encoding", coding)
+        self.send_header("Content-Length", str(len(body) if body is not None else entry["size"]))
+        self.end_headers()
+        if head:
+            return
+
+        if body is not None:
+            self.wfile.write(body)
+            return
+        try:
+            # Large file: kernel copies it straight from the page cache to the socket
+            with open(entry["path"], "rb") as f:
+                self.wfile.count += self.connection.sendfile(f, 0, entry["size"])
+        except OSError:
+            # Client gone, or the file shrank mid-send: the response can't be completed
+            self.close_connection = True
+
+    def is_not_modified(self, entry, etag):
+        """Whether the client's validators match this version of the asset"""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return since.timestamp() >= int(entry["mtime"])
+        return False
+
+    def read_body(self):
+        """Request body (Content-Length bytes), or None once an error reply is sent
+
+        The body is always consumed, or the connection marked for closing,
+        before any reply: unread body bytes would otherwise be parsed as the
+        next request on a keep-alive connection
+        """
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if "Transfer-Encoding" in self.headers or length < 0:
+            self.close_connection = True
+            self.send_json_response({"error": "Invalid request body length"}, status=400)
+            return None
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self.send_json_response({"error": "Request body too large"}, status=413)
+            return None
+        body = self.rfile.read(length)
+        if len(body) < length:
+            # Client went away mid-body
+            self.close_connection = True
+            return None
+        return body
 
     def do_POST(self):
         """Handle POST requests"""
-        if self.path == "/api/file":
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode())
+        body = self.read_body()
+        if body is None:
+            return
+        route = urlparse(self.path).path
+        if route not in ("/api/file", "/api/restart", "/api/settings"):
+            self.send_json_response({"error": "Not found"}, status=404)
+            return
+        try:
+            data = json.loads(body)
+        except ValueError:
+            self.send_json_response({"error": "Invalid JSON"}, status=400)
+            return
+        if not isinstance(data, dict):
+            self.send_json_response({"error": "Expected a JSON object"}, status=400)
+            return
 
-            agent_id = data.get("agent", "main")
+        if route == "/api/file":
+            agent_id = data.get("agent")
             filename = data.get("file", "Soul.md")
             content = data.get("content", "")
 
@@ -261,11 +1081,7 @@ class LumiDashboardHandler(SimpleHTTPRequestHandler):
             else:
                 self.send_json_response({"error": "Failed to save file"}, status=500)
 
-        elif self.path == "/api/restart":
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode())
-
+        elif route == "/api/restart":
             agent_id = data.get("agent", "main")
             success = restart_agent(agent_id)
 
@@ -274,11 +1090,7 @@ class LumiDashboardHandler(SimpleHTTPRequestHandler):
             else:
                 self.send_json_response({"error": "Failed to restart agent"}, status=500)
 
-        elif self.path == "/api/settings":
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode())
-
+        elif route == "/api/settings":
             success = save_settings(data)
 
             if success:
@@ -286,18 +1098,76 @@ class LumiDashboardHandler(SimpleHTTPRequestHandler):
             else:
                 self.send_json_response({"error": "Failed to save settings"}, status=500)
 
-        else:
-            self.send_json_response({"error": "Not found"}, status=404)
-
     def send_json_response(self, data, status=200):
-        """Send JSON response"""
+        """Send JSON response: compact unless ?pretty=1, compressed when large enough"""
+        query = parse_qs(urlparse(self.path).query)
+        self.send_body(encode_json(data, pretty=query.get("pretty", ["0"])[0] == "1"), "application/json", status)
+
+    def send_body(self, body, content_type, status=200):
+        """Send a response body with CORS headers, compressed when large enough"""
+        coding = None
+        if len(body) >= assets.COMPRESS_MIN_BYTES:
+            coding = assets.negotiate_encoding(self.headers.get("Accept-Encoding", ""))
+            if coding:
+                body = assets.compress(body, coding)
+
         self.send_response(status)
-        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Type", content_type)
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Vary", "Accept-Encoding")
+        if coding:
+            self.send_header("Content-Encoding", coding)
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(json.dumps(data, indent=2).encode())
+        self.wfile.write(body)
+
+    def stream_status(self):
+        """Push status changes as Server-Sent Events, with heartbeats while idle"""
+        if not self.stream_slots.acquire(blocking=False):
+            # Too many open streams: the page falls back to polling
+            self.send_json_response({"error": "Too many status streams"}, status=503)
+            return
+
+        try:
+            # A stream holds a stream slot instead of a worker slot
+            self.server.release_worker()
+            STATUS_MONITOR.start()
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("X-Accel-Buffering", "no")
+            self.end_headers()
+            self.write_status_events()
+        finally:
+            self.stream_slots.release()
+
+    def write_status_events(self):
+        """Stream loop for stream_status"""
+        version, status = STATUS_MONITOR.snapshot()
+        try:
+            self.wfile.write(b"retry: 3000\n\n")
+            self.send_status_event(version, status)
+            while True:
+                new_version, status = STATUS_MONITOR.wait_for_change(version, SSE_HEARTBEAT_INTERVAL)
+                if new_version != version:
+                    version = new_version
+                    self.send_status_event(version, status)
+                else:
+                    self.wfile.write(b": heartbeat\n\n")
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            pass
+
+    def send_status_event(self, version, status):
+        """Write one SSE status event"""
+        data = json.dumps({"timestamp": datetime.now().isoformat(), **status})
+        self.wfile.write(f"id: {version}\nevent: status\ndata: {data}\n\n".encode())
+        self.wfile.flush()
 
     def do_OPTIONS(self):
         """Handle OPTIONS for CORS"""
@@ -305,32 +1175,124 @@ class LumiDashboardHandler(SimpleHTTPRequestHandler):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Content-Length", "0")
         self.end_headers()
 
     def log_message(self, format, *args):
         """Suppress default logging"""
         pass
 
+class PooledHTTPServer(HTTPServer):
+    """HTTP server that hands connections to a bounded thread pool
+
+    The pool has MAX_WORKERS threads for ordinary connections plus
+    MAX_STREAMS for long-lived status streams. At most MAX_WORKERS ordinary
+    connections run at once; a connection that becomes a stream gives its
+    worker slot to the next one, so neither open streams nor idle or
+    trickling keep-alive sockets can take the threads the other needs. At
+    most MAX_QUEUED further connections wait for a slot; beyond that, new
+    connections get an immediate 503.
+    """
+
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers=MAX_WORKERS,
+                 max_streams=MAX_STREAMS, max_queued=MAX_QUEUED):
+        super().__init__(server_address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers + max_streams, thread_name_prefix="lumi-http")
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.active = 0
+        self.waiting = deque()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            start = self.active < self.max_workers
+            if start:
+                self.active += 1
+            elif len(self.waiting) < self.max_queued:
+                self.waiting.append((request, client_address))
+                return
+        if start:
+            self.pool.submit(self.process_request_thread, request, client_address)
+        else:
+            self.reject_request(request)
+
+    def release_worker(self):
+        """Hand this thread's worker slot to the next waiting connection"""
+        if not getattr(self.local, "worker", False):
+            return
+        self.local.worker = False
+        with self.lock:
+            if not self.waiting:
+                self.active -= 1
+                return
+            request, client_address = self.waiting.popleft()
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        self.local.worker = True
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.release_worker()
+
+    def reject_request(self, request):
+        """Turn away a connection when the pool and its queue are full"""
+        try:
+            request.settimeout(1)
+            request.sendall(
+                b"HTTP/1.1 503 Service Unavailable\r\n"
+                b"Retry-After: 1\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+            )
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            waiting, self.waiting = self.waiting, deque()
+        for request, _ in waiting:
+            self.shutdown_request(request)
+
 def main():
     """Start the dashboard server"""
     port = 3001
-    server = HTTPServer(("0.0.0.0", port), LumiDashboardHandler)
+    server = PooledHTTPServer(("0.0.0.0", port), LumiDashboardHandler)
+    STATUS_MONITOR.start()
 
     print(f"🦞 Lumi Admin Dashboard running on http://0.0.0.0:{port}")
     print(f"📊 Admin Panel: http://0.0.0.0:{port}/admin.html")
     print(f"📈 Status Page: http://0.0.0.0:{port}/status.html")
     print(f"🔌 API endpoints:")
     print(f"   - GET  /api/status")
+    print(f"   - GET  /api/status/stream (Server-Sent Events)")
+    print(f"   - GET  /api/status/history?from=&to=&bucket=")
     print(f"   - GET  /api/dashboard")
+    print(f"   - GET  /api/bootstrap?agent=X&file=Y")
+    print(f"   - GET  /api/batch?path=/api/A&path=/api/B")
     print(f"   - GET  /api/file?agent=X&file=Y")
     print(f"   - POST /api/file")
     print(f"   - POST /api/restart")
     print(f"📁 Serving from: {DASHBOARD_DIR}")
+    for agent in AGENT_REGISTRY.agents():
+        print(f"🤖 Agent {agent.id}: {agent.workspace}")
+    print(f"🧵 Workers: {MAX_WORKERS} (+{MAX_STREAMS} for status streams), queue: {MAX_QUEUED}")
 
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\n🦞 Dashboard stopped")
+    finally:
+        server.server_close()
 
 if __name__ == "__main__":
     main()